@@ -0,0 +1,365 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from tornado.websocket import websocket_connect
+
+# Make the repository importable when running this script directly.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from src import constants
+
+
+
+APP_FILE = Path(__file__).resolve().parents[1] / "insurance_comparator.py"
+STANDARD_DEDUCIBLES = [300., 500., 1000., 1500., 2000., 2500.]
+LANGUAGES = ["en", "fr", "it", "de"]
+
+
+# Simulated browser tab connected to the app. Like the frontend, it sends the state of its widgets with every rerun request
+# and the hashes of the messages it already received, which the server does not send again. Ids of the widgets are read
+# from the elements of the previous run, since they depend on the labels and so on the language.
+class _Session:
+    def __init__(self, url, language, rng):
+        self.url           = url
+        self.language      = language
+        self.rng           = rng
+        self.n_offers      = constants.MIN_CHOICES
+        self.expected_cost = False
+        self.expenses      = None
+        self.widget_ids    = {}
+        self.cached        = set()
+        self.errors        = []
+        self.connection    = None
+
+    async def connect(self):
+        self.connection = await websocket_connect(self.url, subprotocols = ["streamlit"])
+
+    def close(self):
+        self.connection.close()
+
+    # Requests a rerun with the given edits of the choices editor, and waits until it is finished, including the reruns it
+    # triggers itself (e.g. when switching language).
+    async def rerun(self, edits = None):
+        message = BackMsg()
+        state   = message.rerun_script
+        state.context_info.locale = f"{LANGUAGES[self.language]}-CH"
+        state.cached_message_hashes.extend(self.cached)
+
+        if "language" in self.widget_ids:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.widget_ids["language"]
+            widget.int_array_value.data[:] = [self.language]
+        if "expected_cost" in self.widget_ids:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.widget_ids["expected_cost"]
+            widget.bool_value = self.expected_cost
+        if "expenses" in self.widget_ids and self.expenses is not None:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.widget_ids["expenses"]
+            widget.double_value = self.expenses
+        if "choices_editor" in self.widget_ids:
+            widget = state.widget_states.widgets.add()
+            widget.id = self.widget_ids["choices_editor"]
+            widget.string_value = json.dumps(edits or {"edited_rows": {}, "added_rows": [], "deleted_rows": []})
+
+        self.widget_ids = {}
+        await self.connection.write_message(message.SerializeToString(), binary = True)
+        while True:
+            data = await self.connection.read_message()
+            if data is None:
+                raise ConnectionError("The server closed the connection.")
+            message = ForwardMsg()
+            message.ParseFromString(data)
+            if message.hash:
+                self.cached.add(message.hash)
+
+            kind = message.WhichOneof("type")
+            if kind == "delta" and message.delta.WhichOneof("type") == "new_element":
+                self._read_element(message.delta.new_element)
+            elif kind == "script_finished" and message.script_finished != ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                return
+
+    # The language is chosen with the first pills of the page, the typical expenses with its first number input, which is
+    # only shown once the toggle of the expected cost section is on.
+    def _read_element(self, element):
+        kind = element.WhichOneof("type")
+        if kind == "exception":
+            self.errors.append(element.exception.message)
+        elif kind == "button_group":
+            self.widget_ids.setdefault("language", element.button_group.id)
+        elif kind == "checkbox" and element.checkbox.id.endswith("-expected_cost_enabled"):
+            self.widget_ids["expected_cost"] = element.checkbox.id
+        elif kind == "number_input":
+            self.widget_ids.setdefault("expenses", element.number_input.id)
+        elif kind == "arrow_data_frame" and element.arrow_data_frame.id.endswith("-choices_editor"):
+            self.widget_ids["choices_editor"] = element.arrow_data_frame.id
+
+
+def _random_offer(rng):
+    return {"cost_per_month": round(rng.uniform(200, 500), 2), "deducible": float(rng.choice(STANDARD_DEDUCIBLES)), "excess": 700.}
+
+
+def _make_edits(edited_rows = None, added_rows = None, deleted_rows = None):
+    return {"edited_rows": edited_rows or {}, "added_rows": added_rows or [], "deleted_rows": deleted_rows or []}
+
+
+# Actions of a simulated user, with their relative frequencies. Each one takes the session, changes its widgets and returns
+# the edits of the choices editor to send with the rerun, if any.
+def _edit_offer(session):
+    return _make_edits(edited_rows = {str(session.rng.integers(session.n_offers)): {"cost_per_month": round(session.rng.uniform(200, 500), 2)}})
+
+
+def _add_offer(session):
+    if session.n_offers >= constants.MAX_CHOICES:
+        return _edit_offer(session)
+    session.n_offers += 1
+    return _make_edits(added_rows = [{"label": f"Offer {session.rng.integers(1_000_000_000)}"} | _random_offer(session.rng)])
+
+
+def _delete_offer(session):
+    if session.n_offers <= constants.MIN_CHOICES:
+        return _edit_offer(session)
+    session.n_offers -= 1
+    return _make_edits(deleted_rows = [int(session.rng.integers(session.n_offers + 1))])
+
+
+def _switch_language(session):
+    session.language = int(session.rng.choice([e for e in range(len(LANGUAGES)) if e != session.language]))
+
+
+def _change_expenses(session):
+    session.expected_cost = True
+    session.expenses = float(session.rng.choice([500., 1000., 2000., 5000.]))
+
+
+ACTIONS = {"edit_offer"     : (_edit_offer, 0.4),
+           "add_offer"      : (_add_offer, 0.1),
+           "delete_offer"   : (_delete_offer, 0.1),
+           "switch_language": (_switch_language, 0.2),
+           "change_expenses": (_change_expenses, 0.2)}
+
+
+# Drives one session: a first run, a rerun entering its offers in the choices editor, then n_reruns reruns each preceded by
+# a random action, after a random pause of think_time seconds on average. Returns the session and the duration of every
+# rerun with its action.
+async def _run_session(url, idx, offers, n_reruns, think_time, seed, start):
+    rng     = np.random.default_rng([seed, idx])
+    session = _Session(url, idx % len(LANGUAGES), rng)
+    names, weights = list(ACTIONS), np.array([e[1] for e in ACTIONS.values()])
+
+    records = []
+    try:
+        await session.connect()
+        await start.wait()
+        for rerun in range(n_reruns + 2):
+            edits = None
+            if rerun == 0:
+                action = "first_run"
+            elif rerun == 1:
+                # The app starts with example offers, which are replaced by the offers of the session.
+                action = "enter_offers"
+                edits  = _make_edits(edited_rows = {str(idx): offer for idx, offer in enumerate(offers[:constants.MIN_CHOICES])},
+                                     added_rows  = offers[constants.MIN_CHOICES:])
+                session.n_offers = max(len(offers), constants.MIN_CHOICES)
+            else:
+                if think_time > 0:
+                    await asyncio.sleep(rng.exponential(think_time))
+                action = names[rng.choice(len(names), p = weights / weights.sum())]
+                edits  = ACTIONS[action][0](session)
+
+            started = time.perf_counter()
+            await session.rerun(edits)
+            records.append({"action": action, "latency": time.perf_counter() - started})
+    except Exception as error:
+        session.errors.append(f"{type(error).__name__}: {error}")
+    return session, records
+
+
+# CPU time in seconds, and current and peak resident memory in bytes of a process, read from /proc (Linux only).
+def _process_usage(pid):
+    with open(f"/proc/{pid}/stat") as file:
+        fields = file.read().rsplit(")", 1)[1].split()
+    with open(f"/proc/{pid}/status") as file:
+        status = dict(line.split(":", 1) for line in file if ":" in line)
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    return cpu, int(status["VmRSS"].split()[0]) * 1024, int(status["VmHWM"].split()[0]) * 1024
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# Starts the app on a local port, from a temporary directory holding the secrets it needs, without sending any usage
+# statistics. Analytics are disabled unless requested.
+def _start_server(directory, port, use_analytics):
+    secrets = Path(directory) / ".streamlit" / "secrets.toml"
+    secrets.parent.mkdir()
+    secrets.write_text('ANALYTICS_PASSWORD = "load-test"\n')
+
+    env = dict(os.environ)
+    if use_analytics:
+        env.pop(constants.ANALYTICS_ENV_VAR, None)
+    else:
+        env[constants.ANALYTICS_ENV_VAR] = "off"
+
+    log_path = Path(directory) / "server.log"
+    with open(log_path, "w") as log:
+        server = subprocess.Popen([sys.executable, "-m", "streamlit", "run", str(APP_FILE),
+                                   "--server.headless", "true",
+                                   "--server.address", "127.0.0.1",
+                                   "--server.port", str(port),
+                                   "--server.fileWatcherType", "none",
+                                   "--browser.gatherUsageStats", "false"],
+                                  cwd = directory, env = env, stdout = log, stderr = subprocess.STDOUT)
+
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"The server exited, see its log:\n{log_path.read_text()}")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout = 1):
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("The server did not start within 60 seconds.")
+
+
+def _percentiles(latencies):
+    return {"count": len(latencies),
+            "p50"  : float(np.percentile(latencies, 50)),
+            "p99"  : float(np.percentile(latencies, 99))}
+
+
+# Runs n_sessions sessions at once, after a first session which loads the modules of the app and is not measured. CPU time
+# and memory are those of the server process divided by the number of sessions, since sessions share the process, its
+# caches and the GIL.
+async def _run_sessions(url, pid, n_sessions, n_reruns, n_options, shared_offers, think_time, seed):
+    rng    = np.random.default_rng(seed)
+    offers = [[{"label": f"Option {idx + 1}"} | _random_offer(rng) for idx in range(n_options)] for _ in range(n_sessions + 1)]
+    if shared_offers:
+        offers = [offers[0]] * (n_sessions + 1)
+
+    start = asyncio.Event()
+    start.set()
+    warmup, _ = await _run_session(url, n_sessions, offers[-1], 0, 0, seed, start)
+    warmup.close()
+    if warmup.errors:
+        return None, [f"warm-up session: {error}" for error in warmup.errors]
+
+    # All sessions are connected before the measures start.
+    start = asyncio.Event()
+    tasks = [asyncio.ensure_future(_run_session(url, idx, offers[idx], n_reruns, think_time, seed, start)) for idx in range(n_sessions)]
+    await asyncio.sleep(1)
+    cpu_start, memory_start, _ = _process_usage(pid)
+    wall_start = time.perf_counter()
+    start.set()
+    sessions = await asyncio.gather(*tasks)
+    wall = time.perf_counter() - wall_start
+    cpu_end, memory_end, peak_memory = _process_usage(pid)
+    for session, _ in sessions:
+        session.close()
+
+    records   = [record for _, session_records in sessions for record in session_records]
+    latencies = np.array([e["latency"] for e in records])
+    actions   = [e for e in ["first_run", "enter_offers", *ACTIONS] if any(record["action"] == e for record in records)]
+    results   = {"latency"           : _percentiles(latencies),
+                 "latency_by_action" : {action: _percentiles(latencies[[e["action"] == action for e in records]]) for action in actions},
+                 "reruns_per_second" : len(records) / wall,
+                 "cpu_per_session"   : (cpu_end - cpu_start) / n_sessions,
+                 "cpu_per_rerun"     : (cpu_end - cpu_start) / max(len(records), 1),
+                 "cpu_utilization"   : (cpu_end - cpu_start) / wall,
+                 "memory_per_session": (memory_end - memory_start) / n_sessions,
+                 "peak_memory"       : peak_memory}
+    return results, [f"session {idx}: {error}" for idx, (session, _) in enumerate(sessions) for error in session.errors]
+
+
+def run(n_sessions, n_reruns, n_options, shared_offers, think_time, use_analytics, seed):
+    with tempfile.TemporaryDirectory() as directory:
+        port   = _free_port()
+        server = _start_server(directory, port, use_analytics)
+        try:
+            results, errors = asyncio.run(_run_sessions(f"ws://127.0.0.1:{port}/_stcore/stream", server.pid, n_sessions, n_reruns,
+                                                        n_options, shared_offers, think_time, seed))
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {"meta"   : {"python"       : platform.python_version(),
+                        "platform"     : platform.platform(),
+                        "cpu_count"    : os.cpu_count(),
+                        "sessions"     : n_sessions,
+                        "reruns"       : n_reruns,
+                        "options"      : n_options,
+                        "shared_offers": shared_offers,
+                        "think_time"   : think_time,
+                        "analytics"    : use_analytics,
+                        "seed"         : seed},
+            "results": results,
+            "errors" : errors}
+
+
+def _format_latency(measure):
+    return f"p50 {measure['p50'] * 1000:9.1f} ms, p99 {measure['p99'] * 1000:9.1f} ms over {measure['count']} reruns"
+
+
+def _print_results(results):
+    measures = results["results"]
+    if measures is not None:
+        print(f"{'all reruns':>16}: {_format_latency(measures['latency'])}")
+        for action, measure in measures["latency_by_action"].items():
+            print(f"{action:>16}: {_format_latency(measure)}")
+        print(f"Throughput: {measures['reruns_per_second']:.2f} reruns/s, server CPU: {measures['cpu_per_session']:.3f} s per "
+              f"session, {measures['cpu_per_rerun'] * 1000:.1f} ms per rerun, {measures['cpu_utilization'] * 100:.0f}% of a core")
+        print(f"Server memory: {measures['memory_per_session'] / 1e6:.1f} MB per session, peak {measures['peak_memory'] / 1e6:.1f} MB")
+    for error in results["errors"]:
+        print(f"ERROR {error}")
+
+
+def _parse_args(argv = None):
+    parser = argparse.ArgumentParser(description = "Start the app on a local port and simulate concurrent sessions editing "
+                                                   "offers and switching languages, to measure how many users it can serve.")
+    parser.add_argument("--sessions", type = int, default = 10, help = "Number of concurrent sessions.")
+    parser.add_argument("--reruns", type = int, default = 20,
+                        help = "Number of random actions of each session after entering its offers.")
+    parser.add_argument("--options", type = int, default = 10, help = "Number of offers entered by each session.")
+    parser.add_argument("--shared-offers", action = "store_true",
+                        help = "Enter the same offers in all sessions, as when most users compare the same published offers.")
+    parser.add_argument("--think-time", type = float, default = 0.,
+                        help = "Average pause in seconds of the users between two actions, 0 to send them as fast as possible.")
+    parser.add_argument("--analytics", action = "store_true", help = "Track the sessions with streamlit_analytics.")
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--save", type = Path, help = "Write the results to this JSON file.")
+    return parser.parse_args(argv)
+
+
+def main(argv = None):
+    args = _parse_args(argv)
+    results = run(args.sessions, args.reruns, args.options, args.shared_offers, args.think_time, args.analytics, args.seed)
+    _print_results(results)
+
+    if args.save is not None:
+        args.save.write_text(json.dumps(results, indent = 2) + "\n")
+
+    if results["errors"]:
+        sys.exit(1)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+# Make the repository importable when running this script directly.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import insurance_comparator
+from src import comparison
+
+
+
+STANDARD_DEDUCIBLES = [300., 500., 1000., 1500., 2000., 2500.]
+
+
+# Sets of options used as input of the pipeline. Each function takes the number of options and a random generator.
+def _random_offers(n, rng):
+    return {"cost_per_month": rng.uniform(200, 500, n).round(2),
+            "deducible"     : rng.choice(STANDARD_DEDUCIBLES, n),
+            "excess"        : np.full(n, 700.)}
+
+
+def _huge_deducibles(n, rng):
+    return {"cost_per_month": rng.uniform(50, 500, n).round(2),
+            "deducible"     : rng.uniform(1_000, 50_000, n).round(),
+            "excess"        : rng.choice([350., 700., 5_000.], n)}
+
+
+def _equal_slopes(n, rng):
+    # Same deducible and excess for all options: every curve is parallel to the others and nothing ever crosses.
+    return {"cost_per_month": rng.uniform(200, 500, n).round(2),
+            "deducible"     : np.full(n, 1000.),
+            "excess"        : np.full(n, 700.)}
+
+
+def _identical_offers(n, rng):
+    return {"cost_per_month": np.full(n, 350.),
+            "deducible"     : np.full(n, 1000.),
+            "excess"        : np.full(n, 700.)}
+
+
+CASES = {"random"          : _random_offers,
+         "huge_deducibles" : _huge_deducibles,
+         "equal_slopes"    : _equal_slopes,
+         "identical_offers": _identical_offers}
+
+
+# Stages of the pipeline, in order. Each one takes the outputs of the previous stages and returns its own outputs.
+STAGES = {"points"       : lambda r: comparison.make_df_points(r["offers"]),
+          "lines"        : lambda r: comparison.make_df_lines(r["points"]),
+          "dominance"    : lambda r: comparison.drop_never_worth_it(r["points"], r["lines"]),
+          "intersections": lambda r: comparison.make_intersections(r["dominance"][1]),
+          "ranking_index": lambda r: comparison.make_ranking_index(r["dominance"][0], r["intersections"]),
+          "table"        : lambda r: insurance_comparator._make_comparison_table(comparison.make_ranking_table(r["ranking_index"])),
+          "figure"       : lambda r: insurance_comparator._make_comparison_figure(r["ranking_index"].labels, r["ranking_index"].x,
+                                                                                  r["ranking_index"].y, r["ranking_index"].top_k(3)[0]),
+          "serialization": lambda r: pio.to_json(r["figure"], validate = False)}
+
+
+def _make_offers(case, n, seed):
+    offers = CASES[case](n, np.random.default_rng(seed))
+    return pd.DataFrame({"label": [f"Option {idx + 1}" for idx in range(n)]} | offers)
+
+
+# Times a function by repeating it until min_duration is spent (at least once, at most max_repeats times), then measures
+# its peak memory in a separate run, since tracing allocations slows the code down.
+def _measure(func, min_duration, max_repeats):
+    durations = []
+    while not durations or (sum(durations) < min_duration and len(durations) < max_repeats):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, {"time_min"   : min(durations),
+                    "time_median": statistics.median(durations),
+                    "repeats"    : len(durations),
+                    "peak_memory": peak_memory}
+
+
+def run(cases, sizes, min_duration, max_repeats, seed):
+    results = {}
+    for case in cases:
+        for n in sizes:
+            outputs = {"offers": _make_offers(case, n, seed)}
+            for stage, func in STAGES.items():
+                outputs[stage], results[f"{case}/n={n}/{stage}"] = _measure(lambda: func(outputs), min_duration, max_repeats)
+                print(f"{case:>16} n={n:<5} {stage:>14}: {_format_measure(results[f'{case}/n={n}/{stage}'])}", flush = True)
+
+    return {"meta"   : {"python"  : platform.python_version(),
+                        "numpy"   : np.__version__,
+                        "pandas"  : pd.__version__,
+                        "platform": platform.platform(),
+                        "seed"    : seed},
+            "results": results}
+
+
+def _format_measure(measure):
+    return f"{measure['time_min'] * 1000:10.3f} ms (median {measure['time_median'] * 1000:10.3f} ms), " \
+           f"peak memory {measure['peak_memory'] / 1e6:9.3f} MB"
+
+
+# Returns a list of descriptions of the measures which got slower or use more memory than the baseline by more than
+# threshold times. Differences below the given absolute tolerances are considered noise.
+def compare(results, baseline, threshold, time_tolerance = 1e-3, memory_tolerance = 1e6):
+    regressions = []
+    for key, measure in results["results"].items():
+        reference = baseline["results"].get(key)
+        if reference is None:
+            continue
+        if measure["time_min"] > threshold * reference["time_min"] and measure["time_min"] - reference["time_min"] > time_tolerance:
+            regressions.append(f"{key}: time {reference['time_min'] * 1000:.3f} ms -> {measure['time_min'] * 1000:.3f} ms")
+        if measure["peak_memory"] > threshold * reference["peak_memory"] and measure["peak_memory"] - reference["peak_memory"] > memory_tolerance:
+            regressions.append(f"{key}: peak memory {reference['peak_memory'] / 1e6:.3f} MB -> {measure['peak_memory'] / 1e6:.3f} MB")
+    return regressions
+
+
+def _parse_args(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark each stage of the comparison pipeline over growing numbers of options.")
+    parser.add_argument("--cases", nargs = "+", choices = list(CASES), default = list(CASES))
+    parser.add_argument("--sizes", nargs = "+", type = int, default = [2, 10, 100, 1000],
+                        help = "Numbers of options to benchmark.")
+    parser.add_argument("--min-duration", type = float, default = 0.2,
+                        help = "Minimum time in seconds spent repeating each stage.")
+    parser.add_argument("--max-repeats", type = int, default = 50)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--save", type = Path,
+                        help = "Write the results to this JSON file, e.g. to update the committed baseline.")
+    parser.add_argument("--compare", type = Path,
+                        help = "Baseline JSON file to compare with. Exits with an error if any stage regressed.")
+    parser.add_argument("--threshold", type = float, default = 1.5,
+                        help = "Ratio to the baseline above which a measure is reported as a regression.")
+    return parser.parse_args(argv)
+
+
+def main(argv = None):
+    args = _parse_args(argv)
+    results = run(args.cases, args.sizes, args.min_duration, args.max_repeats, args.seed)
+
+    if args.save is not None:
+        args.save.write_text(json.dumps(results, indent = 2) + "\n")
+
+    if args.compare is not None:
+        regressions = compare(results, json.loads(args.compare.read_text()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+import argparse
+import logging
+import os
+from functools import partial
+from itertools import islice
+from multiprocessing import Pool
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import comparison
+from src import constants
+from src import cost_model
+from src import tables
+
+
+
+OFFER_COLUMNS = ["label", "cost_per_month", "deducible", "excess"]
+
+
+def _parse_args(argv = None):
+    parser = argparse.ArgumentParser(description = "Compare LAMal insurance offers read from a CSV or Parquet file, without starting the Streamlit app.")
+    parser.add_argument("offers", type = Path,
+                        help = "CSV or Parquet file with columns label, cost_per_month, deducible and excess.")
+    parser.add_argument("--group-by", nargs = "+", default = [],
+                        help = "Columns identifying a customer profile. Offers are compared within each profile, and rows of the same "
+                               "profile must be contiguous in the file.")
+    parser.add_argument("--rankings", type = Path, required = True,
+                        help = "Output CSV or Parquet file with the cheapest options for each range of health expenses.")
+    parser.add_argument("--crossovers", type = Path,
+                        help = "Optional output CSV or Parquet file with the health expenses at which options cross each other. "
+                               "Options never among the --top-k cheapest are left out.")
+    parser.add_argument("--top-k", type = int, default = 3,
+                        help = "Number of cheapest options to report for each range of health expenses.")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(),
+                        help = "Number of processes comparing profiles in parallel.")
+    parser.add_argument("--chunk-size", type = int, default = constants.CLI_READ_CHUNK_SIZE,
+                        help = "Number of rows read from the input file at once.")
+    return parser.parse_args(argv)
+
+
+def _iter_groups(chunks, group_by):
+    if not group_by:
+        df = pd.concat(chunks, axis = "index", ignore_index = True)
+        yield (), tuple(df[col_name].to_numpy() for col_name in OFFER_COLUMNS)
+        return
+
+    # A group is only complete once a row of another group is read, so the last group of each chunk is carried over to the
+    # next one. Groups seen before are remembered to detect files which are not sorted by group.
+    seen_keys = set()
+    carry     = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], axis = "index", ignore_index = True)
+        if len(chunk) == 0:
+            continue
+
+        group_ids = chunk.groupby(group_by, sort = False, dropna = False).ngroup().to_numpy()
+        starts    = [0] + (np.flatnonzero(np.diff(group_ids)) + 1).tolist()
+        ends      = starts[1:] + [len(chunk)]
+
+        # Slicing numpy arrays is much cheaper than slicing the dataframe for each group.
+        keys   = list(zip(*(chunk[col_name].to_numpy()[starts[:-1]] for col_name in group_by)))
+        offers = [chunk[col_name].to_numpy() for col_name in OFFER_COLUMNS]
+        for key, start, end in zip(keys, starts[:-1], ends[:-1]):
+            if key in seen_keys:
+                raise ValueError(f"Rows of group {key} are not contiguous, sort the input file by {group_by} first.")
+            seen_keys.add(key)
+            yield key, tuple(e[start:end] for e in offers)
+
+        carry = chunk.iloc[starts[-1]:]
+
+    if carry is not None and len(carry):
+        key = tuple(carry[col_name].iloc[0] for col_name in group_by)
+        if key in seen_keys:
+            raise ValueError(f"Rows of group {key} are not contiguous, sort the input file by {group_by} first.")
+        yield key, tuple(carry[col_name].to_numpy() for col_name in OFFER_COLUMNS)
+
+
+def _compare_groups(groups, group_by, top_k):
+    keys, rankings, crossovers = [], [], []
+    for key, (labels, cost_per_month, deducible, excess) in groups:
+        # Skip profiles which can't be compared instead of stopping the whole run.
+        numbers = np.stack([cost_per_month, deducible, excess]).astype(float)
+
+        # Like in catalogs, deducibles and excesses of 0 (e.g. for children) are raised to the lowest value users can type in
+        # the app, since cost curves need segments of non-zero width. Offers with any other value outside of the bounds of
+        # the app are dropped.
+        numbers[1:] = np.where(numbers[1:] >= 0, np.maximum(numbers[1:], constants.MIN_NUM_INPUTS_VALUE), numbers[1:])
+        invalid = ((numbers < constants.MIN_NUM_INPUTS_VALUE) | (numbers > constants.MAX_NUM_INPUTS_VALUE)).any(axis = 0)
+        if invalid.any():
+            logging.warning(f"Group {key}: dropping {invalid.sum()} offers with values outside of [{constants.MIN_NUM_INPUTS_VALUE}, "
+                            f"{constants.MAX_NUM_INPUTS_VALUE}]: {', '.join(map(str, labels[invalid]))}.")
+            labels, numbers = labels[~invalid], numbers[:, ~invalid]
+
+        if np.isnan(numbers).any() or len(set(labels)) != len(labels) or len(labels) < constants.MIN_CHOICES:
+            logging.warning(f"Skipping group {key}: offers must have unique labels, no missing values, and be at least {constants.MIN_CHOICES}.")
+            continue
+
+        model         = cost_model.CostModel(labels, *numbers)
+        ranking_index = comparison.make_ranking_index_from_model(model, depth = top_k)
+        keys      .append(key)
+        rankings  .append(ranking_index.top_k(top_k))
+        crossovers.append(ranking_index.crossovers)
+
+    # Build a single dataframe for all the groups, instead of one per group.
+    n_rankings   = [len(starts) for starts, _, _ in rankings]
+    n_crossovers = [len(e) for e in crossovers]
+    df_ranking    = pd.DataFrame({"start": np.concatenate([starts for starts, _, _ in rankings] or [[]]),
+                                  "end"  : np.concatenate([ends for _, ends, _ in rankings] or [[]])})
+    df_ranking[comparison.ranking_columns(top_k)] = np.concatenate([labels for _, _, labels in rankings] or [np.empty((0, top_k))])
+    df_crossovers = pd.DataFrame({"health_expenses": np.concatenate(crossovers or [[]])})
+
+    for idx, col_name in reversed(list(enumerate(group_by))):
+        values = [key[idx] for key in keys]
+        df_ranking   .insert(0, col_name, np.repeat(np.asarray(values, dtype = object), n_rankings))
+        df_crossovers.insert(0, col_name, np.repeat(np.asarray(values, dtype = object), n_crossovers))
+    return df_ranking, df_crossovers
+
+
+# Appends dataframes to a CSV or Parquet file, so that results can be written while they are computed.
+class _TableWriter:
+    def __init__(self, path, string_columns = ()):
+        self.path           = path
+        self.string_columns = list(string_columns)
+        self._format        = tables.table_format(path)
+        self._parquet       = None
+        self._n_writes      = 0
+
+    def write(self, df):
+        if self._format == ".csv":
+            df.to_csv(self.path, mode = "w" if self._n_writes == 0 else "a", header = self._n_writes == 0, index = False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index = False)
+            if self._parquet is None:
+                # Columns which may be entirely empty in the first batch must still be typed as strings.
+                schema = table.schema
+                for col_name in self.string_columns:
+                    schema = schema.set(schema.get_field_index(col_name), pa.field(col_name, pa.string()))
+                self._parquet = pq.ParquetWriter(self.path, schema)
+            self._parquet.write_table(table.cast(self._parquet.schema))
+        self._n_writes += 1
+
+    def close(self):
+        if self._n_writes == 0:
+            logging.warning(f"No results were written to {self.path}.")
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+# Runs in the current process, avoiding the cost of starting workers for small files.
+class _NoPool:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return False
+
+    def map(self, func, iterable):
+        return list(map(func, iterable))
+
+
+
+def main(argv = None):
+    args = _parse_args(argv)
+
+    chunks = tables.read_table_chunks(args.offers, OFFER_COLUMNS + args.group_by, args.chunk_size)
+    groups = _iter_groups(chunks, args.group_by)
+    compare_groups = partial(_compare_groups, group_by = args.group_by, top_k = args.top_k)
+
+    rankings_writer   = _TableWriter(args.rankings, string_columns = comparison.ranking_columns(args.top_k))
+    crossovers_writer = None if args.crossovers is None else _TableWriter(args.crossovers)
+
+    # Groups are compared and written in batches, to keep memory bounded with millions of rows. Submitting them all at once
+    # would make the pool read the whole file ahead of the workers. Each task handles several groups to amortize the cost of
+    # sending them to the workers.
+    with Pool(args.workers) if args.workers > 1 else _NoPool() as pool:
+        while batch := list(islice(groups, constants.CLI_BATCH_SIZE)):
+            tasks = [batch[idx : idx + constants.CLI_TASK_SIZE] for idx in range(0, len(batch), constants.CLI_TASK_SIZE)]
+            rankings, crossovers = zip(*pool.map(compare_groups, tasks))
+
+            rankings_writer.write(pd.concat(rankings, axis = "index", ignore_index = True))
+            if crossovers_writer is not None:
+                crossovers_writer.write(pd.concat(crossovers, axis = "index", ignore_index = True))
+
+    rankings_writer.close()
+    if crossovers_writer is not None:
+        crossovers_writer.close()
+
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import tornado.web
+
+from src import cache
+from src import choices
+from src import comparison
+from src import constants
+
+
+
+SECTIONS = ["ranking", "crossovers", "points"]
+
+
+# JSON service comparing offers for other programs, without running a Streamlit session. It runs on Tornado, which is
+# already installed with Streamlit. Comparisons are computed in a pool of processes, so that the event loop keeps serving
+# requests, and are cached like in the app.
+#
+# POST /compare       {"offers": [{"label": ..., "cost_per_month": ..., "deducible": ..., "excess": ...}, ...],
+#                      "include": ["ranking", "crossovers", "points"]}
+# POST /compare/batch {"offer_sets": [[offers of the first set], [offers of the second set], ...], "include": [...]}
+# GET  /health
+
+
+def _parse_args(argv = None):
+    parser = argparse.ArgumentParser(description = "Serve the comparison of insurance offers as a JSON API.")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = 8502)
+    parser.add_argument("--workers", type = int, default = os.cpu_count(),
+                        help = "Number of processes computing comparisons.")
+    return parser.parse_args(argv)
+
+
+# Reads offers given as JSON into choices, without building a dataframe, which would cost more than the rest of a cached
+# request. Raises ValueError for invalid offers.
+def _parse_offers(offers):
+    if not isinstance(offers, list) or not all(isinstance(e, dict) for e in offers):
+        raise ValueError("Offers must be a list of objects.")
+    if not constants.MIN_CHOICES <= len(offers) <= constants.MAX_CHOICES:
+        raise ValueError(f"The number of offers must be between {constants.MIN_CHOICES} and {constants.MAX_CHOICES}.")
+
+    try:
+        labels = [str(e["label"]) for e in offers]
+        values = [[e["cost_per_month"], e["deducible"], e["excess"]] for e in offers]
+    except KeyError as error:
+        raise ValueError(f"Every offer must have the fields {', '.join(choices.COLUMNS)}, missing: {error}.")
+
+    # float() would also accept booleans and numeric strings, which the app never produces.
+    if not all(isinstance(e, (int, float)) and not isinstance(e, bool) for row in values for e in row):
+        raise ValueError("Fields cost_per_month, deducible and excess of the offers must be numbers.")
+    if not all(constants.MIN_NUM_INPUTS_VALUE <= e <= constants.MAX_NUM_INPUTS_VALUE for row in values for e in row):
+        raise ValueError(f"Fields cost_per_month, deducible and excess of the offers must be between {constants.MIN_NUM_INPUTS_VALUE} "
+                         f"and {constants.MAX_NUM_INPUTS_VALUE}.")
+    if len(set(labels)) < len(labels):
+        raise ValueError("Labels of the offers must be unique.")
+    return choices.Choices(labels, np.array(values, dtype = float))
+
+
+def _parse_include(include):
+    include = SECTIONS if include is None else include
+    if not isinstance(include, list) or set(include) - set(SECTIONS):
+        raise ValueError(f"Field include must be a list of sections among: {', '.join(SECTIONS)}.")
+    return tuple(e for e in SECTIONS if e in include)
+
+
+# Runs in the worker processes. Offers are sent as choices, which are cheaper to pickle than dataframes.
+def _compare_offer_sets(offer_sets):
+    return [comparison.compute_comparison(offers.to_dataframe()) for offers in offer_sets]
+
+
+def _finite_or_none(values):
+    return [float(e) if np.isfinite(e) else None for e in values]
+
+
+def _comparison_to_json(ranking_index, never_worth_it, include):
+    result = {"never_worth_it": list(never_worth_it)}
+    if "ranking" in include:
+        starts, ends, top_k = ranking_index.top_k(3)
+        result["ranking"] = [{"start": start, "end": end, "cheapest": cheapest}
+                             for start, end, cheapest in zip(_finite_or_none(starts), _finite_or_none(ends), top_k.tolist())]
+    if "crossovers" in include:
+        result["crossovers"] = _finite_or_none(ranking_index.crossovers)
+    if "points" in include:
+        result["points"] = [{"label": label, "health_expenses": x.tolist(), "money_to_insurance": y.tolist()}
+                            for label, x, y in zip(ranking_index.labels, ranking_index.x, ranking_index.y)]
+    return json.dumps(result, allow_nan = False, separators = (",", ":"))
+
+
+# Returns the JSON results of sets of offers. Responses already sent are served from their own cache, comparisons from the
+# cache shared with the app, and the other sets are sent to the pool in tasks of a few sets, to amortize the cost of
+# inter-process communication.
+async def _compare(pool, offer_sets, include):
+    keys    = [offers.key for offers in offer_sets]
+    results = [cache.responses.get((key, include)) for key in keys]
+
+    todo = {}
+    for key, offers, result in zip(keys, offer_sets, results):
+        if result is None and key not in todo:
+            todo[key] = offers
+
+    comparisons = {key: cache.comparisons.get(key) for key in todo}
+    missing = [key for key, value in comparisons.items() if value is None]
+    tasks   = [missing[idx : idx + constants.SERVICE_TASK_SIZE] for idx in range(0, len(missing), constants.SERVICE_TASK_SIZE)]
+    loop    = asyncio.get_running_loop()
+    computed = await asyncio.gather(*(loop.run_in_executor(pool, _compare_offer_sets, [todo[key] for key in task])
+                                      for task in tasks))
+    for task, task_results in zip(tasks, computed):
+        for key, value in zip(task, task_results):
+            cache.comparisons.put(key, value)
+            comparisons[key] = value
+
+    for key in todo:
+        _, ranking_index, never_worth_it = comparisons[key]
+        todo[key] = _comparison_to_json(ranking_index, never_worth_it, include)
+        cache.responses.put((key, include), todo[key])
+    return [result if result is not None else todo[key] for key, result in zip(keys, results)]
+
+
+class _JSONHandler(tornado.web.RequestHandler):
+    def initialize(self, pool):
+        self.pool = pool
+
+    def write_json(self, body, status = 200):
+        self.set_status(status)
+        self.set_header("Content-Type", "application/json")
+        self.finish(body)
+
+    def write_error_json(self, error):
+        self.write_json(json.dumps({"error": str(error)}), status = 400)
+
+    def read_json(self):
+        try:
+            body = json.loads(self.request.body)
+        except ValueError:
+            raise ValueError("The request body must be valid JSON.")
+        if not isinstance(body, dict):
+            raise ValueError("The request body must be a JSON object.")
+        return body
+
+
+class _CompareHandler(_JSONHandler):
+    async def post(self):
+        try:
+            body    = self.read_json()
+            offers  = _parse_offers(body.get("offers"))
+            include = _parse_include(body.get("include"))
+        except ValueError as error:
+            return self.write_error_json(error)
+
+        result, = await _compare(self.pool, [offers], include)
+        self.write_json(result)
+
+
+class _BatchHandler(_JSONHandler):
+    async def post(self):
+        try:
+            body    = self.read_json()
+            include = _parse_include(body.get("include"))
+            offer_sets = body.get("offer_sets")
+            if not isinstance(offer_sets, list) or len(offer_sets) > constants.SERVICE_BATCH_MAX_SETS:
+                raise ValueError(f"Field offer_sets must be a list of at most {constants.SERVICE_BATCH_MAX_SETS} sets of offers.")
+        except ValueError as error:
+            return self.write_error_json(error)
+
+        # Invalid sets get an error of their own instead of failing the whole batch.
+        parsed = []
+        for offers in offer_sets:
+            try:
+                parsed.append(_parse_offers(offers))
+            except ValueError as error:
+                parsed.append(json.dumps({"error": str(error)}))
+
+        results = iter(await _compare(self.pool, [e for e in parsed if not isinstance(e, str)], include))
+        self.write_json('{"results":[' + ",".join(e if isinstance(e, str) else next(results) for e in parsed) + "]}")
+
+
+class _HealthHandler(tornado.web.RequestHandler):
+    def get(self):
+        self.write({"status": "ok"})
+
+
+def make_app(pool):
+    return tornado.web.Application([(r"/compare", _CompareHandler, {"pool": pool}),
+                                    (r"/compare/batch", _BatchHandler, {"pool": pool}),
+                                    (r"/health", _HealthHandler)])
+
+
+async def main(argv = None):
+    args = _parse_args(argv)
+    with ProcessPoolExecutor(args.workers) as pool:
+        make_app(pool).listen(args.port, address = args.host)
+        print(f"Serving comparisons on http://{args.host}:{args.port}", file = sys.stderr)
+        await asyncio.Event().wait()
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
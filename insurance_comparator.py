@@ -1,15 +1,28 @@
-import logging
-from itertools import combinations
+import base64
+import hashlib
+import io
 from functools import partial
 
 import streamlit as st
-import streamlit_analytics
 import pandas as pd
 import numpy as np
-import plotly.express as px
+import plotly.graph_objects as go
 
+from src import analytics
+from src import cache
+from src import catalog
+from src import choices
+from src import comparison
 from src import constants
+from src import cost_model
+from src import horizon
+from src import household
+from src import incremental
 from src import languages
+from src import precomputed
+from src import profiling
+from src import sensitivity
+from src import stochastic
 
 
 
@@ -35,9 +48,9 @@ def _set_page_config(title, icon):
 
 
 def _choose_language():
-    # On first run, try infering from locale. The format is fr-FR, fr-CH, ...
+    # On first run, try infering from locale. The format is fr-FR, fr-CH, ... or only fr, and empty when unknown.
     if not st.session_state.get("language_inferred_from_locale", False) and st.context.locale is not None:
-        locale_language, _ = st.context.locale.split('-')
+        locale_language = st.context.locale.split('-')[0]
         locale_mapping = {"en": languages.Languages.EN,
                           "fr": languages.Languages.FR,
                           "it": languages.Languages.IT,
@@ -67,109 +80,105 @@ def _choose_language():
         st.rerun()
 
 
-def _get_example_dataframe():
-    return pd.DataFrame([
-        {"label": f"Option 1", "cost_per_month": 500., "deducible": 300. , "excess": 700.},
-        {"label": f"Option 2", "cost_per_month": 400., "deducible": 2500., "excess": 700.}
-    ])
+def _get_example_choices():
+    return choices.Choices(labels = ["Option 1", "Option 2"],
+                           values = [[500., 300. , 700.],
+                                     [400., 2500., 700.]])
 
 
-def _insurance_params_section(df):
-    st.write("### " + languages.get_text("insurance_parameters"))
-
-    # Ensure index of df are unique. It is important later in for loop.
-    df = df.reset_index(drop = True)
-
-    # Set up mappings to help with later for loop.
-    colnames_to_translation_text = {"label"         : "label",
-                                    "cost_per_month": "cost_per_month",
-                                    "deducible"     : "deducible",
-                                    "excess"        : "excess"}
-    if set(colnames_to_translation_text.keys()) != set(df.columns):
-        raise RuntimeError(f"Programming error: the provided dataframe does not have the expected column names: {df.columns}.")
-
-    colnames_to_dtypes = {"label"         : "text",
-                          "cost_per_month": "number",
-                          "deducible"     : "number",
-                          "excess"        : "number"}
-    missing_keys = set(colnames_to_dtypes.keys()) - set(df.columns)
-    if missing_keys:
-        raise RuntimeError(f"Programming error: variable colnames_to_dtypes has some missing keys: {missing_keys}.")
-
-    # We need to do a bit of CSS hacking to prevent flex layout used by Streamlit columns from wrapping the elements on the same line when
-    # the viewport width gets too small.
-    st.markdown(
-        """
-        <style>
-            div.stHorizontalBlock {
-                display: flex !important;
-                flex-flow: row no-wrap !important;
-                min-width: 45rem;
-            }
-            div.stColumn {
-                flex: 1 1 auto;
-                min-width: 1rem;
-            }
-        </style>
-        """,
-        unsafe_allow_html = True)
+CHOICES_EDITOR_KEY = "choices_editor"
+INCREMENTAL_COMPARISON_KEY = "incremental_comparison"
 
-    # Create streamlit columns, accounting for the fact we want an extra one compared to what is in the dataframe to put a button
-    # that deletes the row.
-    col_names = list(df.columns) + ["delete_button"]
-    col_sizes = [1] * len(df.columns) + [0.5]
-    if len(col_names) != len(col_sizes):
-        raise RuntimeError(f"Programming error: something changed and the lenghts don't match...")
-    columns = dict(zip(col_names, st.columns(col_sizes, vertical_alignment = "bottom")))
-    del col_names, col_sizes
-
-    # Display all values of the dataframe and allow updating.
-    for col_name in df.columns:
-        with columns[col_name]:
-            st.write("**" + languages.get_text(colnames_to_translation_text[col_name]) + "**")
-
-            widget_factory = None
-            if colnames_to_dtypes[col_name] == "text":
-                widget_factory = partial(st.text_input,
-                                         max_chars        = constants.MAX_TEXT_INPUTS_LEN,
-                                         type             = "default",
-                                         autocomplete     = "off",
-                                         label_visibility = "collapsed")
-            elif colnames_to_dtypes[col_name] == "number":
-                widget_factory = partial(st.number_input,
-                                         min_value        = constants.MIN_NUM_INPUTS_VALUE,
-                                         max_value        = constants.MAX_NUM_INPUTS_VALUE,
-                                         format           = "%0.2f",
-                                         label_visibility = "collapsed")
-            else:
-                raise RuntimeError(f"Programming error: unhandled data type {colnames_to_dtypes[col_name]}...")
 
-            for idx in df.index:
-                df.loc[idx, col_name] = widget_factory(label = f"Entry {idx}, col {col_name}",
-                                                       value = df.loc[idx, col_name])
+# Applies the edits made in the choices editor to the choices at once. This runs as a callback, i.e. before the script, so
+# the edited choices are used from the very same run, without a second rerun.
+def _apply_choices_edits():
+    edits   = st.session_state[CHOICES_EDITOR_KEY]
+    current = st.session_state["choices"]
+    labels  = list(current.labels)
+    values  = np.array(current.values)
 
-    # Display buttons to delete rows.
-    with columns["delete_button"]:
-        for idx in df.index:
-            if st.button(":material/delete:", key = f"Button to delete row {idx}", disabled = len(df) <= constants.MIN_CHOICES):
-                df = df.loc[df.index != idx]
+    # The comparison of the session follows the same edits, unless it is not up to date with the choices anymore.
+    engine = st.session_state.get(INCREMENTAL_COMPARISON_KEY)
+    if engine is not None and engine.key != current.key:
+        engine = st.session_state[INCREMENTAL_COMPARISON_KEY] = None
 
-    # Display button to add a row.
-    if st.button(languages.get_text("add_row_button"), icon = "➕", key = f"Button to add a row", disabled = len(df) >= constants.MAX_CHOICES):
-        new_row = df.iloc[-1:].copy()
-        new_row["label"] = f"Option {len(df) + 1}"
-        df = pd.concat([df, new_row], axis = "index", ignore_index = True)
+    for position, changes in edits["edited_rows"].items():
+        for col_name, value in changes.items():
+            if col_name == "label":
+                labels[int(position)] = _label_or_default(value, int(position))
+            else:
+                values[int(position), choices.NUMBER_COLUMNS.index(col_name)] = np.nan if value is None else value
+
+    edited_rows = sorted({int(e) for e in edits["edited_rows"]})
+    if engine is not None and edited_rows:
+        engine.update(edited_rows, [labels[e] for e in edited_rows], values[edited_rows])
+
+    # Never delete more rows than allowed, nor add too many rows. The editor itself can not enforce it.
+    deleted_rows = edits["deleted_rows"][:max(len(labels) - constants.MIN_CHOICES, 0)]
+    keep = np.ones(len(labels), dtype = bool)
+    keep[deleted_rows] = False
+    labels, values = [label for label, kept in zip(labels, keep) if kept], values[keep]
+    if engine is not None and deleted_rows:
+        engine.delete(deleted_rows)
+
+    added_rows = edits["added_rows"][:max(constants.MAX_CHOICES - len(labels), 0)]
+    if added_rows:
+        new_labels = [_label_or_default(row.get("label"), len(labels) + idx) for idx, row in enumerate(added_rows)]
+        # Missing numbers of new rows default to the values of the last option.
+        new_values = np.array([[row.get(col_name) for col_name in choices.NUMBER_COLUMNS] for row in added_rows], dtype = float)
+        new_values = np.where(np.isnan(new_values), values[-1], new_values)
+        labels, values = labels + new_labels, np.concatenate([values, new_values])
+        if engine is not None:
+            engine.append(new_labels, new_values)
+
+    st.session_state["choices"] = choices.Choices(labels, values)
+
+
+# Cleared or missing labels arrive as None (or empty), and are replaced by the default label of their position.
+def _label_or_default(label, position):
+    return label if isinstance(label, str) and label else f"Option {position + 1}"
+
+
+# Configuration of the columns of the editors of offers, which keeps their values within the bounds of valid offers.
+def _choices_column_config():
+    number_column = partial(st.column_config.NumberColumn,
+                            min_value = constants.MIN_NUM_INPUTS_VALUE,
+                            max_value = constants.MAX_NUM_INPUTS_VALUE,
+                            format    = "%0.2f",
+                            required  = True)
+    return {"label"         : st.column_config.TextColumn(languages.get_text("label"),
+                                                          max_chars = constants.MAX_TEXT_INPUTS_LEN,
+                                                          required  = True),
+            "cost_per_month": number_column(languages.get_text("cost_per_month")),
+            "deducible"     : number_column(languages.get_text("deducible")),
+            "excess"        : number_column(languages.get_text("excess"))}
+
+
+def _insurance_params_section(current):
+    st.write("### " + languages.get_text("insurance_parameters"))
+    st.caption(languages.get_text("insurance_parameters_editor_help"))
+
+    # A single grid edits all choices, converted to a dataframe only for display. Its edits are applied by
+    # _apply_choices_edits, and the returned dataframe only serves to check the entries.
+    df = st.data_editor(current.to_dataframe(),
+                        key           = CHOICES_EDITOR_KEY,
+                        on_change     = _apply_choices_edits,
+                        num_rows      = "dynamic",
+                        hide_index    = True,
+                        width         = "stretch",
+                        column_config = _choices_column_config())
 
     # Return whether entries are good quality.
     entries_ok = True
 
     # Check the labels provided by user are unique.
-    duplicate_labels = ', '.join(df.loc[df["label"].duplicated(), "label"])
+    duplicate_labels = ', '.join(df.loc[df["label"].duplicated(), "label"].astype(str))
     if duplicate_labels:
         st.error(languages.get_text("error_duplicate_labels").format(duplicate_labels), icon = "🚨")
         entries_ok = False
 
-    # It should not be possible for a user to leave a numerical value blank since number_input will re-fill it with previous value.
+    # It should not be possible for a user to leave a numerical value blank since the columns are required.
     # It should also not be possible for a user to have too many or too little lines.
     # Nonetheless, a small chack won't hurt.
     if df[["cost_per_month", "deducible", "excess"]].isna().any(axis = None):
@@ -182,143 +191,366 @@ def _insurance_params_section(df):
     return df, entries_ok
 
 
-def _make_df_points(df, mergin_right_ratio = 0.15):
-    df_points = []
-    for _, row in df.iterrows():
-        cost_per_year = 12 * row["cost_per_month"]
-        df_points.append({'label': row['label'], 'health_expenses': 0                                        , 'money_to_insurance': cost_per_year})
-        df_points.append({'label': row['label'], 'health_expenses': 0 + row["deducible"]                     , 'money_to_insurance': cost_per_year + row["deducible"]})
-        df_points.append({'label': row['label'], 'health_expenses': 0 + row["deducible"] + row["excess"] * 10, 'money_to_insurance': cost_per_year + row["deducible"] + row["excess"]})
-        df_points.append({'label': row['label'], 'health_expenses': np.inf                                   , 'money_to_insurance': cost_per_year + row["deducible"] + row["excess"]})
-    df_points = pd.DataFrame(df_points)
-
-    # Replace infinites with finite larger than all other points.
-    mask = np.isfinite(df_points['health_expenses'])
-    right_lim = (1 + mergin_right_ratio) * df_points.loc[mask, 'health_expenses'].max()
-    df_points.loc[~mask, 'health_expenses'] = right_lim
-
-    return df_points
-
-
-def _make_df_lines(df_points, x_col = "health_expenses", y_col = "money_to_insurance"):
-    df_lines = []
-    for label, rows in df_points.sort_values(x_col).groupby("label"):
-        for idx in range(len(rows) - 1):
-            start_point = rows.iloc[idx]
-            end_point   = rows.iloc[idx + 1]
-            slope       = (end_point[y_col] - start_point[y_col]) / (end_point[x_col] - start_point[x_col])
-            intercept   = start_point[y_col] - slope * start_point[x_col]
-            df_lines.append({"label": label, "slope": slope, "intercept": intercept, "x_min": start_point[x_col], "x_max": end_point[x_col]})
-    return pd.DataFrame(df_lines)
-
-
-def _make_intersections(df_lines):
-    intersections = set()
-    for label1, label2 in combinations(df_lines["label"].unique(), 2):
-        for _, line1 in df_lines[df_lines["label"] == label1].iterrows():
-            for _, line2 in df_lines[df_lines["label"] == label2].iterrows():
-                if line1["slope"] == line2["slope"]:
-                    continue # In this scenario, we don't care for perfectly overlapping lines
-                x_inter = (line2["intercept"] - line1["intercept"]) / (line1["slope"] - line2["slope"])
-                if x_inter < line1["x_min"] or x_inter < line2["x_min"] or x_inter > line1["x_max"] or x_inter > line2["x_max"]:
-                    continue
-                intersections.add(x_inter)
-    return sorted(intersections)
-
-
-def _draw_comparison_table(df_points, intersections):
-    unique_labels = df_points["label"].unique()
-
-    df_comparison = []
-    for idx in range(len(intersections) + 1):
-        range_start = 0      if idx == 0                  else intersections[idx - 1]
-        range_end   = np.inf if idx == len(intersections) else intersections[idx]
-        middle      = (range_start + range_end) / 2 if np.isfinite(range_end) else range_start + 1000
-
-        # Sort functions by which is smallest in the range.
-        sorted_idx = np.argsort([_get_y_at_x(df_points, label, x = middle) for label in unique_labels])
-
-        # Store the 3 cheapest options.
-        df_comparison.append({"start": range_start,
-                              "end"  : range_end,
-                              "1st"  : unique_labels[sorted_idx[0]],
-                              "2nd"  : unique_labels[sorted_idx[1]],
-                              "3rd"  : None if len(sorted_idx) < 3 else unique_labels[sorted_idx[2]]})
-    df_comparison = pd.DataFrame(df_comparison)
-
-    # Merge ranges which are adjacent and for which the ranking does not change.
-    columns_order = df_comparison.columns
-    groupby_columns = ["1st", "2nd", "3rd"]
-    groups_consecutive = df_comparison[groupby_columns].ne(df_comparison[groupby_columns].shift()) \
-                                                       .any(axis = "columns") \
-                                                       .cumsum()
-    df_comparison = df_comparison.groupby(groups_consecutive) \
-                                 .agg({"start": "min", "end": "max"} | {e: "first" for e in groupby_columns}) \
-                                 .reset_index()
-    df_comparison = df_comparison[columns_order]
+def _get_comparison(current):
+    # Results are cached across sessions, since many users compare the same offers. Only the choices are part of the key,
+    # so reruns caused by other widgets (e.g. the language) are served from the cache.
+    return cache.comparisons.get_or_compute(current.key, partial(_compute_comparison, current))
+
+
+# Computes the comparison with the incremental comparison of the session, which _apply_choices_edits keeps up to date as
+# single rows are edited, added or deleted, so that an edit only computes the crossovers of the few options it makes worth
+# it. The incremental comparison is built from scratch the first time, or when it is not up to date with the choices.
+def _compute_comparison(current):
+    engine = st.session_state.get(INCREMENTAL_COMPARISON_KEY)
+    if engine is None or engine.key != current.key:
+        engine = st.session_state[INCREMENTAL_COMPARISON_KEY] = incremental.IncrementalComparison(current.labels, current.values)
+    return engine.compute()
+
+
+def _format_expenses_range(start, end):
+    return languages.get_text("health_expenses_range_any")                             if start == 0 and not np.isfinite(end) else \
+           languages.get_text("health_expenses_range_less")   .format(round(end))      if start == 0 else \
+           languages.get_text("health_expenses_range_over")   .format(round(start))    if not np.isfinite(end) else \
+           languages.get_text("health_expenses_range_between").format(round(start), round(end))
+
+
+def _make_comparison_table(df_comparison):
 
     # Build final nicely formatted dataframe, with translated text.
     df_final = []
-    for _, row in df_comparison.iterrows():
-        range_text = languages.get_text("health_expenses_range_any")                                 if row["start"] == 0 and not np.isfinite(row["end"]) else \
-                     languages.get_text("health_expenses_range_less")   .format(round(row["end"]))   if row["start"] == 0 else \
-                     languages.get_text("health_expenses_range_over")   .format(round(row["start"])) if not np.isfinite(row["end"]) else \
-                     languages.get_text("health_expenses_range_between").format(round(row["start"]), round(row["end"]))
-
+    for start, end, first, second, third in df_comparison.itertuples(index = False):
         df_final.append({
-            languages.get_text("colname_spend_per_year"): range_text,
-            "🥇 " + languages.get_text("colname_1st_cheapest"): row["1st"],
-            "🥈 " + languages.get_text("colname_2nd_cheapest"): row["2nd"],
-            "🥉 " + languages.get_text("colname_3rd_cheapest"): row["3rd"]
+            languages.get_text("colname_spend_per_year"): _format_expenses_range(start, end),
+            "🥇 " + languages.get_text("colname_1st_cheapest"): first,
+            "🥈 " + languages.get_text("colname_2nd_cheapest"): second,
+            "🥉 " + languages.get_text("colname_3rd_cheapest"): third
         })
     df_final = pd.DataFrame(df_final)
     df_final.columns = [f"**{e}**" for e in df_final.columns]
     df_final = df_final.set_index(df_final.columns[0], drop = True)
+    return df_final
+
+
+def _draw_comparison_table(df_comparison):
+    st.table(_make_comparison_table(df_comparison))
+
+
+def _draw_never_worth_it(never_worth_it):
+    if never_worth_it:
+        st.info(languages.get_text("never_worth_it").format(", ".join(never_worth_it)), icon = "💡")
+
+
+# Draws the cost curves given by their breakpoints x and y, of shape (n_options, n_points), where table_starts are the health
+# expenses at which the ranking of the comparison table changes. Returns the figure with the texts of the current language.
+# Validating it costs more than the rest of drawing the plot, so it is built once per set of options and language and cached.
+def _make_comparison_figure(labels, x, y, table_starts):
+    # Plotly draws hover legends only on actual points, not on the interpolated parts of the lines, and the unified hover needs
+    # all traces to have points at the same x. Instead of densifying every line with a fixed step, which makes the payload grow
+    # with the range of expenses, add a fixed number of hover points shared by all lines, plus the points where the ranking
+    # of the comparison table changes (not all crossovers, whose number grows quadratically with the options). Lines
+    # themselves are exact since they also contain their own breakpoints.
+    shared_x = np.union1d(np.linspace(0, x.max(), constants.PLOT_HOVER_POINTS), table_starts)
+    shared_y = cost_model.interpolate(shared_x, x, y)
+
+    # Draw interactive plots. WebGL traces keep the browser responsive with many options.
+    hover_template = languages.get_text("hover_template")
+    traces = []
+    for idx, label in enumerate(labels):
+        trace_x = np.concatenate([shared_x, x[idx]])
+        trace_y = np.concatenate([shared_y[idx], y[idx]])
+        trace_x, unique_idx = np.unique(trace_x, return_index = True)
+        traces.append({"type": "scattergl", "x": _typed_array(trace_x.round(2)), "y": _typed_array(trace_y[unique_idx].round(2)),
+                       "name": label, "mode": "lines", "hovertemplate": hover_template})
+
+    return go.Figure(data   = traces,
+                     layout = {"hovermode": "x unified",
+                               "legend"   : {"title": {"text": languages.get_text("labels_plot")}},
+                               "yaxis"    : {"fixedrange": True,
+                                             "title"     : {"text": languages.get_text("money_to_insurance_plot")}},
+                               "xaxis"    : {"fixedrange"       : True,
+                                             "title"            : {"text": languages.get_text("health_expenses_plot")},
+                                             "unifiedhovertitle": {"text": languages.get_text("hover_title")}}})
+
+
+# Array in the format plotly uses to send arrays to the browser, which is encoded to JSON as a single string.
+def _typed_array(values):
+    return {"dtype": "f8", "bdata": base64.b64encode(np.ascontiguousarray(values, dtype = "<f8")).decode()}
+
+
+def _draw_comparison_plot(figure):
+    st.plotly_chart(figure, config = {'displaylogo': False})
+
+
+def _draw_profiling_panel(profiler):
+    summary = profiler.summary()
+    with st.sidebar:
+        st.write("### Profiling")
+        st.dataframe(pd.DataFrame(summary["stages"]).set_index("stage"))
+        st.write(f"Total: {summary['total_ms']:.1f} ms")
+
+
+
+# The sections below the comparison are much slower than the comparison itself, and would slow down every edit of the
+# choices. Each one is only computed once the user turns on its toggle, whose state is kept across languages by its key.
+def _section_enabled(key):
+    return st.toggle(languages.get_text("show_section"), key = key)
+
+
+def _sensitivity_section(current):
+    st.write("### " + languages.get_text("sensitivity"))
+    st.write(languages.get_text("sensitivity_explaination"))
+    if not _section_enabled("sensitivity_enabled"):
+        return
+
+    # Invalid entries are already reported by the choices section.
+    if not np.isfinite(current.values).all():
+        return
+
+    columns = st.columns(3)
+    option  = columns[0].selectbox(languages.get_text("sensitivity_option"), range(len(current)),
+                                   format_func = lambda idx: current.labels[idx])
+    x_param = columns[1].selectbox(languages.get_text("sensitivity_x_parameter"), sensitivity.PARAMETERS,
+                                   format_func = languages.get_text)
+    y_param = columns[2].selectbox(languages.get_text("sensitivity_y_parameter"), [e for e in sensitivity.PARAMETERS if e != x_param],
+                                   format_func = languages.get_text)
+
+    # Grid around the current values of the option.
+    x_current, y_current = (current.values[option, sensitivity.PARAMETERS.index(e)] for e in (x_param, y_param))
+    x_values, y_values = (np.maximum(np.linspace(1 - constants.SENSITIVITY_RANGE_RATIO, 1 + constants.SENSITIVITY_RANGE_RATIO,
+                                                 constants.SENSITIVITY_GRID_SIZE) * value, constants.MIN_NUM_INPUTS_VALUE)
+                          for value in (x_current, y_current))
+
+    key = (current.key, option, x_param, y_param)
+    try:
+        starts, _, widths = cache.sensitivities.get_or_compute(key, partial(sensitivity.sweep, current.to_cost_model(), option,
+                                                                            x_param, x_values, y_param, y_values))
+    except ValueError as error:
+        st.error(str(error), icon = "🚨")
+        return
+
+    hover_template = languages.get_text("sensitivity_hover_template").format(languages.get_text(x_param), languages.get_text(y_param))
+    figure = go.Figure([go.Heatmap(x = x_values.round(2), y = y_values.round(2), z = widths.round(), customdata = starts.round(),
+                                   colorscale = "Viridis", colorbar = {"title": {"text": languages.get_text("sensitivity_colorbar")}},
+                                   hovertemplate = hover_template),
+                        go.Scatter(x = [x_current], y = [y_current], mode = "markers", name = languages.get_text("sensitivity_current"),
+                                   marker = {"symbol": "x", "size": 12, "color": "white", "line": {"width": 1, "color": "black"}},
+                                   hoverinfo = "skip", showlegend = False)])
+    figure.update_layout(xaxis = {"title": {"text": languages.get_text(x_param)}},
+                         yaxis = {"title": {"text": languages.get_text(y_param)}})
+    st.plotly_chart(figure, config = {'displaylogo': False})
+
+
+def _get_catalog(uploaded_file):
+    content = uploaded_file.getvalue()
+    key     = hashlib.sha256(content).hexdigest()
+    return cache.catalogs.get_or_compute(key, partial(catalog.Catalog.from_file, io.BytesIO(content), uploaded_file.name))
+
+
+def _get_histogram(uploaded_file):
+    content = uploaded_file.getvalue()
+    return stochastic.Histogram.from_file(io.BytesIO(content), uploaded_file.name)
+
+
+# Lets the user describe the distribution of their medical expenses. Returns None until it is fully described.
+def _choose_expenses_distribution():
+    kinds = {"lognormal"    : languages.get_text("distribution_lognormal"),
+             "zero_inflated": languages.get_text("distribution_zero_inflated"),
+             "histogram"    : languages.get_text("distribution_histogram")}
+    kind = st.radio(languages.get_text("distribution"), list(kinds), format_func = kinds.get, horizontal = True)
+
+    if kind == "histogram":
+        uploaded_file = st.file_uploader(languages.get_text("histogram_file"), type = ["csv", "parquet"])
+        if uploaded_file is None:
+            return None
+        try:
+            return _get_histogram(uploaded_file)
+        except ValueError as error:
+            st.error(languages.get_text("error_histogram").format(error), icon = "🚨")
+            return None
+
+    columns = st.columns(3 if kind == "zero_inflated" else 2)
+    median  = columns[0].number_input(languages.get_text("typical_expenses"),
+                                      min_value = constants.MIN_NUM_INPUTS_VALUE,
+                                      value     = 1000.,
+                                      step      = 100.)
+    sigma   = columns[1].number_input(languages.get_text("expenses_spread"), min_value = 0., max_value = 5., value = 1., step = 0.1)
+    distribution = stochastic.LogNormal(median, sigma)
+    if kind == "zero_inflated":
+        p_zero = columns[2].slider(languages.get_text("probability_no_expenses"), min_value = 0, max_value = 100, value = 30, format = "%d%%")
+        distribution = stochastic.ZeroInflated(p_zero / 100, distribution)
+    return distribution
+
+
+def _expected_cost_section(current):
+    st.write("### " + languages.get_text("expected_cost"))
+    st.write(languages.get_text("expected_cost_explaination"))
+    if not _section_enabled("expected_cost_enabled"):
+        return None
+
+    distribution = _choose_expenses_distribution()
+    if distribution is None:
+        return None
+
+    key = (current.key, distribution.key)
+    df_simulation = cache.simulations.get_or_compute(key, partial(stochastic.simulate, current.to_cost_model(), distribution))
+
+    df_final = pd.DataFrame({languages.get_text("label")                 : df_simulation["label"],
+                             languages.get_text("colname_expected_cost") : df_simulation["expected_cost"].round()})
+    for percentile in constants.MONTE_CARLO_PERCENTILES:
+        df_final[languages.get_text("colname_percentile").format(percentile)] = df_simulation[f"p{percentile}"].round()
+    df_final[languages.get_text("colname_probability_cheapest")] = (100 * df_simulation["probability_cheapest"]).round(1)
+    st.dataframe(df_final.sort_values(df_final.columns[1], kind = "stable"), hide_index = True)
+    return distribution
+
+
+# Projects the costs of the offers over several years, with the medical expenses of every year drawn from the distribution
+# chosen in the expected cost section.
+def _multi_year_section(current, distribution):
+    st.write("### " + languages.get_text("multi_year"))
+    st.write(languages.get_text("multi_year_explaination"))
+    if not _section_enabled("multi_year_enabled"):
+        return
+
+    if distribution is None:
+        st.info(languages.get_text("multi_year_needs_distribution"), icon = "💡")
+        return
+
+    columns = st.columns(3)
+    n_years = columns[0].slider(languages.get_text("multi_year_n_years"), min_value = 2, max_value = constants.HORIZON_MAX_YEARS,
+                                value = constants.HORIZON_DEFAULT_YEARS)
+    premium_growth  = columns[1].number_input(languages.get_text("premium_growth"), min_value = -50., max_value = 50.,
+                                              value = constants.HORIZON_DEFAULT_PREMIUM_GROWTH, step = 0.5)
+    expenses_growth = columns[2].number_input(languages.get_text("expenses_growth"), min_value = -50., max_value = 50.,
+                                              value = 0., step = 0.5)
+
+    key = (current.key, distribution.key, n_years, premium_growth, expenses_growth)
+    df_options, df_scenarios = cache.horizons.get_or_compute(key, partial(horizon.simulate, current.to_cost_model(), distribution,
+                                                                          n_years, premium_growth / 100, expenses_growth / 100))
+
+    df_final = pd.DataFrame({languages.get_text("label"): df_options["label"]})
+    for year in range(1, n_years + 1):
+        df_final[languages.get_text("colname_year").format(year)] = df_options[f"year_{year}"].round()
+    df_final[languages.get_text("colname_expected_total")] = df_options["expected_total"].round()
+    for percentile in constants.MONTE_CARLO_PERCENTILES:
+        df_final[languages.get_text("colname_percentile_total").format(percentile)] = df_options[f"p{percentile}"].round()
+    df_final[languages.get_text("colname_probability_cheapest_total")] = (100 * df_options["probability_cheapest"]).round(1)
+    st.dataframe(df_final.sort_values(languages.get_text("colname_expected_total"), kind = "stable"), hide_index = True)
+
+    # One point per scenario, colored by the offer cheapest over its years.
+    st.write(languages.get_text("multi_year_plot_explaination"))
+    figure = go.Figure([go.Scattergl(x = df_cheapest["total_expenses"].round(), y = df_cheapest["cheapest_cost"].round(),
+                                     customdata = df_cheapest["savings"].round(), mode = "markers", name = str(label),
+                                     marker = {"size": 4, "opacity": 0.6},
+                                     hovertemplate = languages.get_text("multi_year_hover_template"))
+                        for label, df_cheapest in df_scenarios.groupby("cheapest", sort = False)])
+    figure.update_layout(xaxis = {"title": {"text": languages.get_text("multi_year_total_expenses")}},
+                         yaxis = {"title": {"text": languages.get_text("multi_year_cheapest_cost")}})
+    st.plotly_chart(figure, config = {'displaylogo': False})
+
+
+# Lets the user describe every member of the household, with their own offers (starting from the choices) and range of
+# expected medical expenses. Returns a list of tuples (df_offers, low, high).
+def _household_members(current):
+    n_members = st.number_input(languages.get_text("household_n_members"),
+                                min_value = 1,
+                                max_value = constants.MAX_HOUSEHOLD_MEMBERS,
+                                value     = 2)
+
+    members = []
+    for idx, tab in enumerate(st.tabs([languages.get_text("household_member").format(idx + 1) for idx in range(n_members)])):
+        with tab:
+            # Each member edits their own copy of the choices, stored once so that it is not reset when the choices change.
+            df_member = st.session_state.setdefault(f"household_member_{idx}", current)
+            df_member = st.data_editor(df_member.to_dataframe(),
+                                       key           = f"household_member_editor_{idx}",
+                                       num_rows      = "dynamic",
+                                       hide_index    = True,
+                                       width         = "stretch",
+                                       column_config = _choices_column_config())
+
+            columns = st.columns(2)
+            low  = columns[0].number_input(languages.get_text("household_expenses_low"), key = f"household_low_{idx}",
+                                           min_value = 0., value = 0., step = 100.)
+            high = columns[1].number_input(languages.get_text("household_expenses_high"), key = f"household_high_{idx}",
+                                           min_value = 0., value = 5000., step = 100.)
+            members.append((df_member.dropna().reset_index(drop = True), low, high))
+    return members
+
+
+def _household_section(current):
+    st.write("### " + languages.get_text("household"))
+    st.write(languages.get_text("household_explaination"))
+    if not _section_enabled("household_enabled"):
+        return
+
+    # Results are cached like the other sections, keyed by the offers and the range of expenses of every member.
+    members = _household_members(current)
+    key     = tuple((cache.choices_key(df_offers), low, high) for df_offers, low, high in members)
+    try:
+        chosen, expected_total = cache.households.get_or_compute(key, partial(household.optimize, members))
+    except ValueError as error:
+        st.error(languages.get_text("error_household").format(error), icon = "🚨")
+        return
+
+    rows = []
+    for idx, ((df_offers, low, high), choice) in enumerate(zip(members, chosen)):
+        model = cost_model.CostModel.from_dataframe(df_offers.iloc[[choice]])
+        costs = model.cost_at([low, high])[0]
+        rows.append({languages.get_text("household_colname_member")       : languages.get_text("household_member").format(idx + 1),
+                     languages.get_text("household_colname_offer")        : df_offers["label"].iloc[choice],
+                     languages.get_text("household_colname_expected_cost"): round(household.expected_costs(model, low, high)[0]),
+                     languages.get_text("household_colname_cost_low")     : round(costs[0]),
+                     languages.get_text("household_colname_cost_high")    : round(costs[1])})
+    st.dataframe(pd.DataFrame(rows), hide_index = True)
+    st.write(languages.get_text("household_expected_total").format(round(expected_total)))
+
+
+def _market_comparison_section():
+    st.write("### " + languages.get_text("market_comparison"))
+    st.write(languages.get_text("market_comparison_explaination"))
+
+    uploaded_file = st.file_uploader(languages.get_text("catalog_file"), type = ["csv", "parquet"])
+    if uploaded_file is None:
+        return
+
+    try:
+        market = _get_catalog(uploaded_file)
+    except ValueError as error:
+        st.error(languages.get_text("error_catalog").format(error), icon = "🚨")
+        return
+
+    columns  = st.columns(2)
+    region   = columns[0].selectbox(languages.get_text("region"), market.regions())
+    age_band = columns[1].selectbox(languages.get_text("age_band"), market.age_bands(region))
+    if region is None or age_band is None:
+        return
+
+    df_offers   = market.offers(region, age_band)
+    df_cheapest = catalog.cheapest(df_offers)
+    st.write(languages.get_text("market_n_offers").format(len(df_offers)))
+
+    df_final = pd.DataFrame({languages.get_text("colname_spend_per_year"): [_format_expenses_range(start, end) for start, end in zip(df_cheapest["start"], df_cheapest["end"])],
+                             "🥇 " + languages.get_text("colname_1st_cheapest"): df_cheapest["label"]})
+    df_final.columns = [f"**{e}**" for e in df_final.columns]
+    df_final = df_final.set_index(df_final.columns[0], drop = True)
     st.table(df_final)
 
 
-def _get_y_at_x(df_points, label, x, x_col = "health_expenses", y_col = "money_to_insurance"):
-    df_points = df_points[df_points["label"] == label].sort_values(x_col)
-    return np.interp(x, df_points[x_col], df_points[y_col])
-
-
-def _draw_comparison_plot(df_points, intersections, x_col = "health_expenses", y_col = "money_to_insurance", color_col = "label"):
-    color_col_ordering = df_points[color_col].unique()
-
-    # Add points to the lines, since Plotly will draw hover legends only on actual points, not on the interpolated parts of the line.
-    new_x_coords = set(np.arange(0, df_points[x_col].max(), constants.PLOT_INTERP_STEP)) | set(intersections)
-    new_rows = []
-
-    for label, df_label in df_points.groupby(color_col):
-         x = list(new_x_coords - set(df_label[x_col]))
-         y = _get_y_at_x(df_points, label, x)
-         for x_iter, y_iter in zip(x, y):
-             new_rows.append({color_col: label, x_col: x_iter, y_col: y_iter})
-
-    df_points = pd.concat([df_points, pd.DataFrame(new_rows)], axis = "index", ignore_index = True)
-    df_points[color_col] = pd.Categorical(df_points[color_col], categories = color_col_ordering)
-    df_points = df_points.sort_values([color_col, x_col])
-
-    # Draw interactive plots.
-    fig = px.line(df_points, x = x_col, y = y_col, color = color_col,
-                  labels = {x_col    : languages.get_text("health_expenses_plot"),
-                            y_col    : languages.get_text("money_to_insurance_plot"),
-                            color_col: languages.get_text("labels_plot")},
-                  custom_data = ['label'])
-
-    fig.update_traces(hovertemplate = languages.get_text("hover_template"))
-
-    fig.update_layout(hovermode = "x unified",
-                      yaxis = {"fixedrange": True},
-                      xaxis = {"fixedrange": True,
-                               "unifiedhovertitle": {"text": languages.get_text("hover_title")}})
-
-    st.plotly_chart(fig, config = {'displaylogo': False})
+# Streamlit forbids mixing st.query_params with the deprecated API used by streamlit_analytics, so use the latter too. It
+# logs a deprecation warning, so it is only called when the answer matters, see below.
+def _analytics_dashboard_requested():
+    return "on" in st.experimental_get_query_params().get("analytics", [])
 
 
 
 if __name__ == "__main__":
-    streamlit_analytics.start_tracking()
+    # Analytics are loaded in the background to keep cold starts fast, see analytics module. They are waited for only when
+    # they are enabled but still loading and the analytics dashboard is requested.
+    streamlit_analytics = analytics.get()
+    if streamlit_analytics is None and not analytics.is_disabled() and _analytics_dashboard_requested():
+        streamlit_analytics = analytics.get(wait = True)
+    if streamlit_analytics is not None:
+        streamlit_analytics.start_tracking()
 
     _choose_language()
     _set_page_config(languages.get_text("title"), icon = "💸")
@@ -327,34 +559,69 @@ if __name__ == "__main__":
     st.title(languages.get_text("title"))
     st.write(languages.get_text("decription"))
 
-    st.session_state["choices"] = st.session_state.get("choices", _get_example_dataframe())
-
-    # Create section to edit choices dataframe. Also need to handle Streamlit not updating frontend
-    # if values are changed from session_state after the widget was rendered. This is done with a rerun
-    # if a change is detected.
-    df_old = st.session_state["choices"]
-    df_new, entries_ok = _insurance_params_section(df_old)
-    if not df_old.equals(df_new):
-        st.session_state["choices"] = df_new
-        st.rerun()
-    del df_old, df_new
-
-    st.write("### " + languages.get_text("comparison"))
-    df_points     = _make_df_points(st.session_state["choices"])
-    df_lines      = _make_df_lines(df_points)
-    intersections = _make_intersections(df_lines)
-
-    st.write(languages.get_text("comparison_table_explaination"))
-    _draw_comparison_table(df_points, intersections)
-
-    st.write(languages.get_text("comparison_plot_explaination"))
-    _draw_comparison_plot(df_points, intersections)
+    st.session_state["choices"] = st.session_state.get("choices", _get_example_choices())
+
+    # Time each stage of the run, see profiling module for how to enable logs, the panel and memory measures.
+    with profiling.profile_rerun() as profiler:
+        # Edits of the choices are applied to session_state by the editor's callback before this run started.
+        with profiler.stage("params_section"):
+            _, entries_ok = _insurance_params_section(st.session_state["choices"])
+
+        # Invalid entries are reported by the choices section and can not be compared, so nothing depending on the choices
+        # is computed until they are fixed.
+        if entries_ok:
+            st.write("### " + languages.get_text("comparison"))
+            with profiler.stage("comparison") as record:
+                # Common sets of offers are precomputed offline, see precompute_comparisons.py. Others are computed live.
+                key = st.session_state["choices"].key
+                precomputed_result = precomputed.lookup(key)
+                record["precomputed"] = precomputed_result is not None
+                if precomputed_result is not None:
+                    df_comparison, never_worth_it, (labels, x, y) = precomputed_result
+                else:
+                    record["cache_hit"] = key in cache.comparisons
+                    # Options dropped by the comparison because they are never among the cheapest ones are listed after it.
+                    _, ranking_index, never_worth_it = _get_comparison(st.session_state["choices"])
+                    df_comparison  = comparison.make_ranking_table(ranking_index)
+                    labels, x, y   = ranking_index.labels, ranking_index.x, ranking_index.y
+                del key, precomputed_result
+
+            st.write(languages.get_text("comparison_table_explaination"))
+            with profiler.stage("table"):
+                _draw_comparison_table(df_comparison)
+                _draw_never_worth_it(never_worth_it)
+
+            st.write(languages.get_text("comparison_plot_explaination"))
+            with profiler.stage("plot_figure") as record:
+                # The cached figure is shared between sessions, and is never modified since st.plotly_chart copies it.
+                key = (st.session_state["choices"].key, languages.get_lang())
+                record["cache_hit"] = key in cache.figures
+                figure = cache.figures.get_or_compute(key, partial(_make_comparison_figure, labels, x, y, df_comparison["start"]))
+                del key
+            with profiler.stage("plot_chart"):
+                _draw_comparison_plot(figure)
+            del figure, labels, x, y
+
+            with profiler.stage("sensitivity_section"):
+                _sensitivity_section(st.session_state["choices"])
+
+            with profiler.stage("expected_cost_section"):
+                distribution = _expected_cost_section(st.session_state["choices"])
+
+            with profiler.stage("multi_year_section"):
+                _multi_year_section(st.session_state["choices"], distribution)
+            del distribution
+
+        with profiler.stage("household_section"):
+            _household_section(st.session_state["choices"])
+
+        with profiler.stage("market_section"):
+            _market_comparison_section()
+
+        if profiling.is_enabled("panel"):
+            _draw_profiling_panel(profiler)
 
     # This will stop tracking and display the collected data.
-    # Since it uses a deprecated API, need to silence warning coming from Streamlit when calling it.
-    deprecation_logger = logging.getLogger("streamlit.deprecation_util")
-    deprecation_logger_level = deprecation_logger.getEffectiveLevel()
-    deprecation_logger.setLevel(logging.ERROR)
-    streamlit_analytics.stop_tracking(unsafe_password = st.secrets["ANALYTICS_PASSWORD"])
-    deprecation_logger.setLevel(deprecation_logger_level)
-    del deprecation_logger, deprecation_logger_level
+    if streamlit_analytics is not None:
+        streamlit_analytics.stop_tracking(unsafe_password = st.secrets["ANALYTICS_PASSWORD"])
+    del streamlit_analytics
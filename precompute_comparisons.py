@@ -0,0 +1,77 @@
+import argparse
+import logging
+import os
+import sys
+from multiprocessing import Pool
+from pathlib import Path
+
+from src import cache
+from src import comparison
+from src import constants
+from src import precomputed
+from src import tables
+
+
+
+OFFER_COLUMNS = ["label", "cost_per_month", "deducible", "excess"]
+
+
+def _parse_args(argv = None):
+    parser = argparse.ArgumentParser(description = "Precompute the comparison of common sets of offers, to be served by the app without any computation.")
+    parser.add_argument("offers", type = Path,
+                        help = "CSV or Parquet file with columns label, cost_per_month, deducible and excess.")
+    parser.add_argument("--group-by", nargs = "+", default = [],
+                        help = "Columns identifying a set of offers. Offers are compared within each set, in the order of the file.")
+    parser.add_argument("--output", type = Path, required = True,
+                        help = "Directory of the precomputed artifact. The app reads it from its precomputed directory by default.")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(),
+                        help = "Number of processes comparing sets of offers in parallel.")
+    return parser.parse_args(argv)
+
+
+# Runs the same computations as the app for a set of offers. The app draws the plot from the breakpoints of the curves.
+def _precompute(df):
+    _, ranking_index, never_worth_it = comparison.compute_comparison(df)
+    return (cache.choices_key(df),
+            comparison.make_ranking_table(ranking_index),
+            never_worth_it,
+            (ranking_index.labels, ranking_index.x, ranking_index.y))
+
+
+# Sets the app would reject can never be looked up, see _choices_column_config and _insurance_params_section in the app.
+def _accepted_by_app(df):
+    numbers = df[OFFER_COLUMNS[1:]].to_numpy()
+    labels  = df["label"]
+    return (constants.MIN_CHOICES <= len(df) <= constants.MAX_CHOICES
+            and labels.map(lambda e: isinstance(e, str) and len(e) <= constants.MAX_TEXT_INPUTS_LEN).all()
+            and not labels.duplicated().any()
+            and ((numbers >= constants.MIN_NUM_INPUTS_VALUE) & (numbers <= constants.MAX_NUM_INPUTS_VALUE)).all())
+
+
+def _iter_sets(df_offers, group_by):
+    groups = df_offers.groupby(group_by, sort = False) if group_by else [((), df_offers)]
+    for values, df in groups:
+        # Same types as the choices edited in the app, otherwise keys would not match.
+        df = df[OFFER_COLUMNS].reset_index(drop = True).astype({"label": object, "cost_per_month": float, "deducible": float, "excess": float})
+        if not _accepted_by_app(df):
+            logging.warning(f"Skipping set {values}: the app only accepts {constants.MIN_CHOICES} to {constants.MAX_CHOICES} offers with "
+                            f"unique labels of at most {constants.MAX_TEXT_INPUTS_LEN} characters, and values between "
+                            f"{constants.MIN_NUM_INPUTS_VALUE} and {constants.MAX_NUM_INPUTS_VALUE}.")
+            continue
+        yield df
+
+
+def main(argv = None):
+    args = _parse_args(argv)
+    df_offers = tables.read_table(args.offers, columns = OFFER_COLUMNS + args.group_by)
+
+    with Pool(args.workers) as pool:
+        entries = pool.imap(_precompute, _iter_sets(df_offers, args.group_by), chunksize = constants.CLI_TASK_SIZE // 10)
+        precomputed.write(args.output, entries)
+
+    print(f"Precomputed comparisons written to {args.output}.", file = sys.stderr)
+
+
+
+if __name__ == "__main__":
+    main()
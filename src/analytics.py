@@ -0,0 +1,50 @@
+import importlib
+import os
+import threading
+
+from src import constants
+
+
+
+# Importing streamlit_analytics takes more than a second (it pulls in the Firestore client and Altair), which would delay
+# the first page served by a freshly started container. It is instead imported in a background thread when the first run
+# starts, and runs before the import finishes are simply not tracked.
+_loaded = threading.Event()
+_lock   = threading.Lock()
+_thread = None
+_module = None
+
+
+def _load():
+    global _module
+    try:
+        _module = importlib.import_module("streamlit_analytics")
+    finally:
+        _loaded.set()
+
+
+def preload():
+    global _thread
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target = _load, name = "streamlit_analytics import", daemon = True)
+            _thread.start()
+
+
+# Analytics can be turned off by setting an environment variable to "off", e.g. to run the app offline or to measure it
+# without tracking.
+def is_disabled():
+    return os.environ.get(constants.ANALYTICS_ENV_VAR, "").strip().lower() == "off"
+
+
+# Returns the streamlit_analytics module, or None if it is still being imported or analytics are disabled. With wait, blocks
+# until it is available, e.g. when the analytics dashboard is requested.
+def get(wait = False):
+    if is_disabled():
+        return None
+    preload()
+    if wait:
+        _loaded.wait()
+    if not _loaded.is_set() or _module is None:
+        return None
+    return _module
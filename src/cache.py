@@ -0,0 +1,123 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from src import constants
+
+
+
+# Bounded, thread-safe, least-recently-used cache. Since modules are imported once per process, a cache stored at module
+# level is shared by all Streamlit sessions. When several threads ask for the same missing key, only the first one computes
+# the value while the others wait for it.
+class LRUCache:
+    def __init__(self, max_entries):
+        if max_entries < 1:
+            raise ValueError(f"Programming error: the cache must be able to hold at least one entry, got: {max_entries}.")
+
+        self.max_entries = max_entries
+        self._entries    = OrderedDict()
+        self._pending    = {}
+        self._lock       = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default = None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last = False)
+
+    def get_or_compute(self, key, compute):
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    return self._entries[key]
+
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    break
+
+            # Another thread is computing this value: wait for it, then look it up again (it may have failed).
+            pending.wait()
+
+        try:
+            value = compute()
+            self.put(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Canonical hash of a choices table, which only depends on the labels and numerical values of the options, in order.
+def choices_key(df):
+    return offers_key(df[["cost_per_month", "deducible", "excess"]].to_numpy(dtype = float), df["label"])
+
+
+# Same hash from the values (cost_per_month, deducible, excess) of the options as a (n, 3) array and their labels, for
+# callers that do not hold the options in a dataframe.
+def offers_key(values, labels):
+    values = np.ascontiguousarray(values, dtype = float)
+
+    digest = hashlib.sha256()
+    digest.update(repr(values.shape).encode())
+    digest.update(values.tobytes())
+    digest.update("\x1f".join(str(label) for label in labels).encode())
+    return digest.hexdigest()
+
+
+# Results of the comparison pipeline, keyed by choices_key. Values stored here are shared between sessions and must not
+# be modified.
+comparisons = LRUCache(constants.COMPARISONS_CACHE_MAX_ENTRIES)
+
+
+# Validated comparison figures, keyed by choices_key and language. Figures of many options weigh megabytes, so fewer of them
+# are kept.
+figures = LRUCache(constants.FIGURES_CACHE_MAX_ENTRIES)
+
+
+# Premium catalogs loaded from files, keyed by the hash of the file content.
+catalogs = LRUCache(constants.CATALOGS_CACHE_MAX_ENTRIES)
+
+
+# Results of simulations of the expected costs, keyed by choices_key and the key of the expenses distribution.
+simulations = LRUCache(constants.SIMULATIONS_CACHE_MAX_ENTRIES)
+
+
+# Multi-year simulations, keyed by choices_key, the key of the expenses distribution, the number of years and the growth
+# rates of the premiums and of the expenses.
+horizons = LRUCache(constants.HORIZONS_CACHE_MAX_ENTRIES)
+
+
+# Assignments of offers to the members of a household, keyed by choices_key and the range of expenses of every member.
+households = LRUCache(constants.HOUSEHOLDS_CACHE_MAX_ENTRIES)
+
+
+# Sensitivity sweeps of an option, keyed by choices_key, the option and the two parameters varied.
+sensitivities = LRUCache(constants.SENSITIVITIES_CACHE_MAX_ENTRIES)
+
+
+# JSON responses of the comparison service, keyed by choices_key and the sections included in the response.
+responses = LRUCache(constants.RESPONSES_CACHE_MAX_ENTRIES)
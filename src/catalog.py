@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from src import constants
+from src import cost_model
+from src import envelope
+from src import tables
+
+
+
+CATALOG_COLUMNS = ["insurer", "model", "region", "age_band", "deducible", "cost_per_month"]
+CATEGORICAL_COLUMNS = ["insurer", "model", "region", "age_band"]
+NUMERICAL_COLUMNS = ["deducible", "cost_per_month", "excess"]
+
+
+# Premium catalog of a whole market, i.e. every insurer x model x deducible for each region and age band. String columns
+# are stored as categoricals, and rows are sorted by region and age band so that the offers of any of them are a
+# contiguous slice, found through an index built once.
+class Catalog:
+    def __init__(self, df):
+        missing_columns = set(CATALOG_COLUMNS) - set(df.columns)
+        if missing_columns:
+            raise ValueError(f"The catalog is missing the following columns: {', '.join(sorted(missing_columns))}.")
+
+        df = df[[e for e in CATALOG_COLUMNS + ["excess"] if e in df.columns]].copy()
+        if "excess" not in df.columns:
+            df["excess"] = constants.DEFAULT_EXCESS
+
+        for col_name in CATEGORICAL_COLUMNS:
+            df[col_name] = df[col_name].astype(str).astype("category")
+        for col_name in NUMERICAL_COLUMNS:
+            df[col_name] = pd.to_numeric(df[col_name], errors = "coerce")
+        if df[NUMERICAL_COLUMNS].isna().any(axis = None) or (df[NUMERICAL_COLUMNS] < 0).any(axis = None):
+            raise ValueError(f"Columns {', '.join(NUMERICAL_COLUMNS)} of the catalog must only contain positive numbers.")
+
+        # Cost curves need segments of non-zero width, e.g. children may have a deducible of 0. Use the same lower bound as
+        # the values users can type in the app, which does not change costs in any meaningful way.
+        df[["deducible", "excess"]] = df[["deducible", "excess"]].clip(lower = constants.MIN_NUM_INPUTS_VALUE)
+
+        self._df = df.sort_values(["region", "age_band"], kind = "stable").reset_index(drop = True)
+
+        group_ids = self._df.groupby(["region", "age_band"], observed = True, sort = False).ngroup().to_numpy()
+        starts    = np.flatnonzero(np.diff(group_ids, prepend = -1))
+        ends      = np.append(starts[1:], len(group_ids))
+        keys      = zip(self._df["region"].to_numpy()[starts], self._df["age_band"].to_numpy()[starts])
+        self._index = {key: slice(start, end) for key, start, end in zip(keys, starts, ends)}
+
+    @classmethod
+    def from_file(cls, file, file_name = None):
+        return cls(tables.read_table(file, file_name))
+
+    def __len__(self):
+        return len(self._df)
+
+    def regions(self):
+        return sorted({region for region, _ in self._index})
+
+    def age_bands(self, region):
+        return sorted(age_band for key_region, age_band in self._index if key_region == region)
+
+    # Returns the offers of a region and age band, labelled by insurer, model and deducible. A catalog may list the same
+    # insurer, model and deducible more than once (e.g. for several plans or excesses), and offers are identified by their
+    # labels when compared, so repeated labels are numbered.
+    def offers(self, region, age_band):
+        df = self._df.iloc[self._index[(region, age_band)]]
+        labels = df["insurer"].astype(str) + " · " + df["model"].astype(str) + " · " + df["deducible"].round().astype(int).astype(str)
+        repeat = labels.groupby(labels.to_numpy()).cumcount()
+        labels = labels.where(repeat == 0, labels + " (" + (repeat + 1).astype(str) + ")")
+        return df.assign(label = labels.to_numpy()).reset_index(drop = True)
+
+
+# Returns the cheapest of the offers of a region and age band, as returned by Catalog.offers, for each range of health
+# expenses.
+def cheapest(df_offers):
+    model = cost_model.CostModel.from_dataframe(df_offers)
+    slope, intercept, _, _ = model.segments
+    if not envelope.is_concave(slope):
+        raise RuntimeError("Programming error: the cost curves are expected to be concave.")
+
+    starts, ends, options = envelope.lower_envelope(np.repeat(np.arange(len(model)), slope.shape[1]), slope, intercept)
+    df_cheapest = df_offers.iloc[options][["label", "insurer", "model", "deducible", "cost_per_month", "excess"]]
+    df_cheapest.insert(0, "start", starts)
+    df_cheapest.insert(1, "end", ends)
+    return df_cheapest.reset_index(drop = True)
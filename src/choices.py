@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from src import cache
+from src import cost_model
+
+
+
+COLUMNS        = ["label", "cost_per_month", "deducible", "excess"]
+NUMBER_COLUMNS = COLUMNS[1:]
+
+
+# Compact table of insurance options, as kept in the session state of every user: the labels as a tuple and the numbers as
+# a read-only (n, 3) float array with columns cost_per_month, deducible and excess. A dataframe costs kilobytes even with a
+# couple of rows, while this only costs its values, and comparing or hashing it does not go through pandas. It is only
+# converted to a dataframe to be displayed. Choices are never modified, edits create new ones.
+class Choices:
+    __slots__ = ("labels", "values", "_key")
+
+    def __init__(self, labels, values):
+        self.labels = tuple(labels)
+        self.values = np.array(values, dtype = float).reshape(len(self.labels), len(NUMBER_COLUMNS))
+        self.values.flags.writeable = False
+        self._key   = None
+
+    def to_dataframe(self):
+        return pd.DataFrame({"label"         : pd.Series(self.labels, dtype = object),
+                             "cost_per_month": self.values[:, 0],
+                             "deducible"     : self.values[:, 1],
+                             "excess"        : self.values[:, 2]})
+
+    def to_cost_model(self):
+        return cost_model.CostModel(np.array(self.labels, dtype = object), self.values[:, 0], self.values[:, 1], self.values[:, 2])
+
+    def __len__(self):
+        return len(self.labels)
+
+    # Same as cache.choices_key of the choices as a dataframe, computed once.
+    @property
+    def key(self):
+        if self._key is None:
+            self._key = cache.offers_key(self.values, self.labels)
+        return self._key
+
+    def __eq__(self, other):
+        if not isinstance(other, Choices):
+            return NotImplemented
+        return self.labels == other.labels and np.array_equal(self.values, other.values, equal_nan = True)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"Choices({len(self)} options: {', '.join(map(str, self.labels))})"
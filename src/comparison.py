@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from src import cost_model
+from src import crossovers
+from src import envelope
+from src import ranking
+
+
+# Pure computation of the comparison between insurance options. This module must stay independent of Streamlit and
+# plotting libraries, so that it can be used from the command line or other services.
+
+
+
+def make_df_points(df, mergin_right_ratio = 0.15):
+    x, y = cost_model.CostModel.from_dataframe(df, mergin_right_ratio = mergin_right_ratio).breakpoints
+    return pd.DataFrame({"label"             : np.repeat(df["label"].to_numpy(), x.shape[1]),
+                         "health_expenses"   : x.ravel(),
+                         "money_to_insurance": y.ravel()})
+
+
+def points_to_arrays(df_points, x_col = "health_expenses", y_col = "money_to_insurance"):
+    # Reshape the long-format points into arrays of shape (n_labels, n_points), sorted by x within each label.
+    codes, labels = pd.factorize(df_points["label"])
+    counts = np.bincount(codes)
+    if (counts != counts[0]).any():
+        raise RuntimeError(f"Programming error: all labels are expected to have the same number of points, got: {counts}.")
+
+    order = np.lexsort((df_points[x_col].to_numpy(), codes))
+    shape = (len(labels), counts[0])
+    x = df_points[x_col].to_numpy()[order].reshape(shape)
+    y = df_points[y_col].to_numpy()[order].reshape(shape)
+    return np.asarray(labels, dtype = object), x, y
+
+
+def make_df_lines(df_points, x_col = "health_expenses", y_col = "money_to_insurance"):
+    labels, x, y = points_to_arrays(df_points, x_col, y_col)
+    slope, intercept, x_min, x_max = cost_model.segments_from_breakpoints(x, y)
+    return pd.DataFrame({"label"    : np.repeat(labels, slope.shape[1]),
+                         "slope"    : slope.ravel(),
+                         "intercept": intercept.ravel(),
+                         "x_min"    : x_min.ravel(),
+                         "x_max"    : x_max.ravel()})
+
+
+# Removes the options which are never among the k cheapest at any amount of expenses, since they can not appear in the
+# ranking of the k cheapest options. Only the few options left go through the expensive stages (intersections, ranking
+# and plotting). Returns the filtered points and lines, and the labels of the removed options.
+def drop_never_worth_it(df_points, df_lines, k = 3):
+    codes, labels = pd.factorize(df_lines["label"])
+    slope     = df_lines["slope"].to_numpy().reshape(len(labels), -1)
+    intercept = df_lines["intercept"].to_numpy().reshape(len(labels), -1)
+    # Layers of the lower envelope only describe concave curves, e.g. not those of degenerate options with a null deducible.
+    if not envelope.is_concave(slope):
+        return df_points, df_lines, []
+
+    worth_it = labels[envelope.top_layers(codes, slope, intercept, k)]
+    never_worth_it = labels[~labels.isin(worth_it)].tolist()
+    return (df_points[df_points["label"].isin(worth_it)].reset_index(drop = True),
+            df_lines[df_lines["label"].isin(worth_it)].reset_index(drop = True),
+            never_worth_it)
+
+
+def make_intersections(df_lines):
+    codes, _ = pd.factorize(df_lines["label"])
+    return crossovers.find_crossovers(codes, df_lines["slope"], df_lines["intercept"], df_lines["x_min"], df_lines["x_max"])
+
+
+def make_ranking_index(df_points, intersections):
+    labels, x, y = points_to_arrays(df_points)
+    return ranking.RankingIndex(labels, x, y, intersections)
+
+
+# Same as make_intersections followed by make_ranking_index, but working directly on the arrays of a cost model. This avoids
+# the overhead of building intermediate dataframes when comparing many small sets of options. When a depth is given, the
+# options never among the depth cheapest are dropped first, like drop_never_worth_it does.
+def make_ranking_index_from_model(model, depth = None):
+    slope, intercept, x_min, x_max = model.segments
+    x, y = model.breakpoints
+    labels = model.labels
+    if depth is not None and envelope.is_concave(slope):
+        worth_it = envelope.top_layers(np.repeat(np.arange(len(model)), slope.shape[1]), slope, intercept, depth)
+        slope, intercept, x_min, x_max, x, y, labels = (e[worth_it] for e in (slope, intercept, x_min, x_max, x, y, labels))
+
+    option_idx    = np.repeat(np.arange(len(labels)), slope.shape[1])
+    intersections = crossovers.find_crossovers(option_idx, slope, intercept, x_min, x_max)
+    return ranking.RankingIndex(labels, x, y, intersections, depth = depth)
+
+
+# Returns the points and the ranking index of the options worth it, and the labels of the options never among the k
+# cheapest, in the order of the choices.
+def compute_comparison(df, k = 3):
+    df_points     = make_df_points(df)
+    df_lines      = make_df_lines(df_points)
+    df_points, df_lines, never_worth_it = drop_never_worth_it(df_points, df_lines, k)
+    intersections = make_intersections(df_lines)
+    ranking_index = make_ranking_index(df_points, intersections)
+    return df_points, ranking_index, never_worth_it
+
+
+# Returns the k cheapest options of every range of health expenses, without any formatting or translation.
+def make_ranking_table(ranking_index, k = 3):
+    starts, ends, top_k = ranking_index.top_k(k)
+    df_ranking = pd.DataFrame(top_k, columns = ranking_columns(k))
+    df_ranking.insert(0, "start", starts)
+    df_ranking.insert(1, "end", ends)
+    return df_ranking
+
+
+def ranking_columns(k = 3):
+    return [_ordinal(idx) for idx in range(1, k + 1)]
+
+
+def _ordinal(number):
+    suffix = "th" if 10 <= number % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
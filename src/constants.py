@@ -1,6 +1,41 @@
 MIN_CHOICES = 2
-MAX_CHOICES = 10
+MAX_CHOICES = 200
 MAX_TEXT_INPUTS_LEN = 20
 MIN_NUM_INPUTS_VALUE = 0.01
 MAX_NUM_INPUTS_VALUE = 5000.
-PLOT_INTERP_STEP = 20
\ No newline at end of file
+PLOT_HOVER_POINTS = 400
+INTERSECTIONS_CHUNK_SIZE = 1_000_000
+EVALUATION_CHUNK_SIZE = 1_000_000
+COMPARISONS_CACHE_MAX_ENTRIES = 256
+CLI_READ_CHUNK_SIZE = 100_000
+CLI_BATCH_SIZE = 20_000
+CLI_TASK_SIZE = 500
+DEFAULT_EXCESS = 700.
+CATALOGS_CACHE_MAX_ENTRIES = 4
+PROFILING_ENV_VAR = "INSURANCE_COMPARATOR_PROFILING"
+PROFILING_DUMP_DIR_ENV_VAR = "INSURANCE_COMPARATOR_PROFILE_DIR"
+MONTE_CARLO_DRAWS = 1_000_000
+MONTE_CARLO_MAX_EVALUATIONS = 10_000_000
+MONTE_CARLO_CHUNK_SIZE = 2_000_000
+MONTE_CARLO_HISTOGRAM_BINS = 4096
+MONTE_CARLO_PERCENTILES = (5, 50, 95)
+MONTE_CARLO_SEED = 0
+SIMULATIONS_CACHE_MAX_ENTRIES = 64
+MAX_HOUSEHOLD_MEMBERS = 6
+HOUSEHOLDS_CACHE_MAX_ENTRIES = 64
+PRECOMPUTED_DIR = "precomputed"
+PRECOMPUTED_DIR_ENV_VAR = "INSURANCE_COMPARATOR_PRECOMPUTED_DIR"
+SERVICE_TASK_SIZE = 16
+SERVICE_BATCH_MAX_SETS = 10_000
+RESPONSES_CACHE_MAX_ENTRIES = 4096
+SENSITIVITY_GRID_SIZE = 200
+SENSITIVITY_RANGE_RATIO = 0.5
+SENSITIVITIES_CACHE_MAX_ENTRIES = 64
+CROSSOVERS_RELATIVE_TOLERANCE = 1e-9
+HORIZON_DEFAULT_YEARS = 3
+HORIZON_MAX_YEARS = 5
+HORIZON_SCENARIOS = 10_000
+HORIZON_DEFAULT_PREMIUM_GROWTH = 3.
+HORIZONS_CACHE_MAX_ENTRIES = 64
+FIGURES_CACHE_MAX_ENTRIES = 32
+ANALYTICS_ENV_VAR = "INSURANCE_COMPARATOR_ANALYTICS"
@@ -0,0 +1,112 @@
+from functools import cached_property
+
+import numpy as np
+
+from src import constants
+
+
+
+# Holds all insurance options as flat arrays, so that the piecewise-linear cost curves of every option can be
+# derived at once with array operations instead of looping over rows.
+class CostModel:
+    def __init__(self, labels, cost_per_month, deducible, excess, mergin_right_ratio = 0.15):
+        self.labels             = np.asarray(labels, dtype = object)
+        self.cost_per_month     = np.asarray(cost_per_month, dtype = float)
+        self.deducible          = np.asarray(deducible, dtype = float)
+        self.excess             = np.asarray(excess, dtype = float)
+        self.mergin_right_ratio = mergin_right_ratio
+
+        shapes = {e.shape for e in (self.labels, self.cost_per_month, self.deducible, self.excess)}
+        if len(shapes) != 1 or self.labels.ndim != 1:
+            raise ValueError(f"All options parameters must be 1-dimensional arrays of the same length, got shapes: {shapes}.")
+
+    @classmethod
+    def from_dataframe(cls, df, mergin_right_ratio = 0.15):
+        return cls(labels             = df["label"].to_numpy(),
+                   cost_per_month     = df["cost_per_month"].to_numpy(),
+                   deducible          = df["deducible"].to_numpy(),
+                   excess             = df["excess"].to_numpy(),
+                   mergin_right_ratio = mergin_right_ratio)
+
+    def __len__(self):
+        return len(self.labels)
+
+    # Returns two arrays of shape (n_options, 4) with the coordinates of the points where each cost curve changes slope.
+    # The last point is the flat part of the curve, placed slightly to the right of all other points.
+    @cached_property
+    def breakpoints(self):
+        cost_per_year = 12 * self.cost_per_month
+
+        x = np.stack([np.zeros_like(self.deducible),
+                      0 + self.deducible,
+                      0 + self.deducible + self.excess * 10,
+                      np.full_like(self.deducible, np.inf)], axis = 1)
+        y = np.stack([cost_per_year,
+                      cost_per_year + self.deducible,
+                      cost_per_year + self.deducible + self.excess,
+                      cost_per_year + self.deducible + self.excess], axis = 1)
+
+        # Replace infinites with finite larger than all other points.
+        mask = np.isfinite(x)
+        if mask.any():
+            x[~mask] = (1 + self.mergin_right_ratio) * x[mask].max()
+
+        return x, y
+
+    @cached_property
+    def segments(self):
+        return segments_from_breakpoints(*self.breakpoints)
+
+    # Returns the money paid to the insurance by every option at every expense level, with shape (n_options, len(x)).
+    # The expense levels are processed in chunks to keep the memory used by intermediate arrays bounded.
+    def cost_at(self, x, chunk_size = constants.EVALUATION_CHUNK_SIZE):
+        x = np.atleast_1d(np.asarray(x, dtype = float))
+        xp, fp = self.breakpoints
+        slopes = self.segments[0]
+
+        chunk_len = max(chunk_size // max(len(self), 1), 1)
+        return np.concatenate([interpolate(x[idx : idx + chunk_len], xp, fp, slopes) for idx in range(0, len(x), chunk_len)] or
+                              [np.empty((len(self), 0))], axis = 1)
+
+
+# Takes breakpoints of shape (n_options, n_points), sorted along the last axis, and returns slope, intercept, x_min
+# and x_max of every segment joining consecutive points, each of shape (n_options, n_points - 1).
+def segments_from_breakpoints(x, y):
+    x_min, x_max = x[:, :-1], x[:, 1:]
+    slope        = (y[:, 1:] - y[:, :-1]) / (x_max - x_min)
+    intercept    = y[:, :-1] - slope * x_min
+    return slope, intercept, x_min, x_max
+
+
+# Cost curves are concave, so over x >= 0 each of them is the minimum of the lines extending its segments, which is much
+# cheaper to evaluate than interpolating between breakpoints. Returns costs of shape (n_options, len(x)).
+def concave_costs(slope, intercept, x):
+    costs = slope[:, :1] * x + intercept[:, :1]
+    for idx in range(1, slope.shape[1]):
+        np.minimum(costs, slope[:, idx : idx + 1] * x + intercept[:, idx : idx + 1], out = costs)
+    return costs
+
+
+# Vectorized equivalent of calling np.interp(x, xp[i], fp[i]) for every row i: xp and fp have shape (n_options, n_points),
+# with xp sorted along the last axis, and the result has shape (n_options, len(x)). The slopes of the segments can be passed
+# when already known, to avoid recomputing them.
+def interpolate(x, xp, fp, slopes = None):
+    x = np.asarray(x, dtype = float)
+    n_rows, n_points = xp.shape
+    if slopes is None:
+        slopes = (fp[:, 1:] - fp[:, :-1]) / (xp[:, 1:] - xp[:, :-1])
+
+    # Index of the segment containing each x, such that xp[j] <= x < xp[j + 1].
+    j = np.zeros((n_rows, len(x)), dtype = np.intp)
+    for col in range(1, n_points - 1):
+        j += x >= xp[:, col : col + 1]
+
+    # Gather from the flattened arrays, which is much faster than fancy indexing on two dimensions.
+    rows   = np.arange(n_rows)[:, None]
+    points = j + rows * n_points
+    result = slopes.ravel()[points - rows] * (x - xp.ravel()[points]) + fp.ravel()[points]
+
+    # Outside of the breakpoints, np.interp returns the values at the extremities.
+    result = np.where(x >= xp[:, -1:], fp[:, -1:], result)
+    result = np.where(x <  xp[:, :1] , fp[:, :1] , result)
+    return result
@@ -0,0 +1,76 @@
+import numpy as np
+
+from src import constants
+
+
+
+# Finds the x coordinates at which segments belonging to different options cross each other. Segments are given as flat
+# arrays, with option_idx telling which option each segment belongs to.
+#
+# Instead of testing every pair of segments, segments are sorted by their start and swept from left to right: a segment
+# can only cross the ones starting before it ends. The candidate pairs are then checked in batches with array operations,
+# which keeps memory bounded even with hundreds of options.
+def find_crossovers(option_idx, slope, intercept, x_min, x_max, chunk_size = constants.INTERSECTIONS_CHUNK_SIZE):
+    option_idx, slope, intercept, x_min, x_max = (np.asarray(e).ravel() for e in (option_idx, slope, intercept, x_min, x_max))
+
+    order = np.argsort(x_min, kind = "stable")
+    option_idx, slope, intercept, x_min, x_max = (e[order] for e in (option_idx, slope, intercept, x_min, x_max))
+
+    # For each segment, candidates are the following segments (in sweep order) which start before it ends.
+    first_candidate = np.arange(1, len(x_min) + 1)
+    end_candidate   = np.maximum(np.searchsorted(x_min, x_max, side = "right"), first_candidate)
+    n_candidates    = end_candidate - first_candidate
+
+    intersections = []
+    for idx1 in _chunk_by_cumulative_size(n_candidates, chunk_size):
+        # Expand (segment, candidate) pairs of this chunk.
+        counts = n_candidates[idx1]
+        offset = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        idx1   = np.repeat(idx1, counts)
+        idx2   = first_candidate[idx1] + offset
+
+        # We don't care about segments of the same option.
+        mask = option_idx[idx1] != option_idx[idx2]
+        idx1, idx2 = idx1[mask], idx2[mask]
+
+        x_inter = segment_crossovers(slope[idx1], intercept[idx1], x_min[idx1], x_max[idx1],
+                                     slope[idx2], intercept[idx2], x_min[idx2], x_max[idx2])
+        intersections.append(x_inter[~np.isnan(x_inter)])
+
+    return unique_within_tolerance(np.concatenate(intersections)).tolist()
+
+
+# Returns, for pairs of segments given as broadcastable arrays, where they cross with shape (3, *pairs_shape), NaN where
+# they do not. The first row holds the crossing of segments with different slopes. Segments often cross exactly at the end
+# of one of them, which rounding errors can move slightly outside of it, so crossings within a relative tolerance of the
+# segments are kept (and moved onto them). Collinear segments (parallel ones with the same intercept, up to rounding) cost
+# the same along their overlap, and the next rows hold where the overlap starts and ends, unless both segments start
+# (resp. end) there anyway, since their options only part ways at these points.
+def segment_crossovers(slope1, intercept1, x_min1, x_max1, slope2, intercept2, x_min2, x_max2,
+                       rel_tol = constants.CROSSOVERS_RELATIVE_TOLERANCE):
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        x_inter = (intercept2 - intercept1) / (slope1 - slope2)
+    start, end = np.maximum(x_min1, x_min2), np.minimum(x_max1, x_max2)
+    margin     = rel_tol * np.maximum(np.abs(x_inter), 1)
+
+    crossing  = (slope1 != slope2) & (x_inter >= start - margin) & (x_inter <= end + margin)
+    x_inter   = np.clip(x_inter, start, end)
+    collinear = (slope1 == slope2) & (np.abs(intercept1 - intercept2) <= rel_tol * np.maximum(np.abs(intercept1), 1)) & (start <= end)
+    return np.stack(np.broadcast_arrays(np.where(crossing, x_inter, np.nan),
+                                        np.where(collinear & (x_min1 != x_min2), start, np.nan),
+                                        np.where(collinear & (x_max1 != x_max2), end, np.nan)))
+
+
+# Sorted unique values, where values closer than a relative tolerance are considered the same. The same crossover is often
+# found by several pairs of segments, with different rounding errors, and each copy would add a spurious interval.
+def unique_within_tolerance(values, rel_tol = constants.CROSSOVERS_RELATIVE_TOLERANCE):
+    values = np.unique(values)
+    keep   = np.concatenate([[True], np.diff(values) > rel_tol * np.maximum(np.abs(values[1:]), 1)])
+    return values[keep[:len(values)]]
+
+
+# Splits indices into consecutive chunks whose sizes sum up to roughly chunk_size each.
+def _chunk_by_cumulative_size(sizes, chunk_size):
+    chunk_ids = np.cumsum(sizes) // max(chunk_size, 1)
+    boundaries = np.flatnonzero(np.diff(chunk_ids)) + 1
+    return np.split(np.arange(len(sizes)), boundaries)
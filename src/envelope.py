@@ -0,0 +1,70 @@
+import numpy as np
+
+
+
+# Cost curves are concave (the slope can only decrease as health expenses grow: first all expenses are paid up to the
+# deducible, then only the excess rate, then nothing). A concave piecewise-linear curve is the minimum of the lines
+# extending its segments, so the lower envelope of all options is simply the lower envelope of all these lines. This
+# makes it possible to find the cheapest option over any amount of expenses in O(n log n), without computing any pairwise
+# intersection, which scales to catalogs of tens of thousands of offers.
+
+
+# Returns starts, ends and the option index of the pieces of the lower envelope over x >= 0, with adjacent pieces of the
+# same option merged. When several options are tied on a piece, the one with the smallest index is returned.
+def lower_envelope(option_idx, slope, intercept):
+    option_idx, slope, intercept = (np.asarray(e).ravel() for e in (option_idx, slope, intercept))
+    if len(slope) == 0:
+        return np.empty(0), np.empty(0), np.empty(0, dtype = int)
+
+    # For each distinct slope, only the lowest line (and among ties, the option with smallest index) can be on the envelope.
+    order = np.lexsort((option_idx, intercept, -slope))
+    slope, intercept, option_idx = slope[order], intercept[order], option_idx[order]
+    first_of_slope = np.concatenate([[True], slope[1:] != slope[:-1]])
+    slope, intercept, option_idx = slope[first_of_slope], intercept[first_of_slope], option_idx[first_of_slope]
+
+    # Lines are now sorted by decreasing slope, which is the order in which they appear on the envelope as x increases.
+    # Classic convex hull trick: a line is dropped when the next one crosses the previous one before it does.
+    hull = []
+    for idx in range(len(slope)):
+        while len(hull) >= 2 and _crossing(hull[-2], idx, slope, intercept) <= _crossing(hull[-2], hull[-1], slope, intercept):
+            hull.pop()
+        hull.append(idx)
+    hull = np.array(hull)
+
+    # Pieces of the envelope, only keeping the part with x >= 0.
+    ends   = np.append([_crossing(i, j, slope, intercept) for i, j in zip(hull[:-1], hull[1:])], np.inf)
+    starts = np.concatenate([[-np.inf], ends[:-1]])
+    keep   = ends > 0
+    starts, ends, options = np.maximum(starts[keep], 0), ends[keep], option_idx[hull[keep]]
+
+    # Merge adjacent pieces of the same option, e.g. the deducible and excess segments of the same offer.
+    first = np.concatenate([[True], options[1:] != options[:-1]])
+    last  = np.concatenate([first[1:], [True]])
+    return starts[first], ends[last], options[first]
+
+
+# Returns the sorted indices of the options on the first k layers of the lower envelope, i.e. on the envelope of all options,
+# or on the envelope of the options left once those are removed, and so on. At any amount of expenses, removing a layer
+# removes the cheapest remaining option, so an option which is among the k cheapest somewhere is on one of the first k
+# layers. The other options are never among the k cheapest.
+def top_layers(option_idx, slope, intercept, k):
+    option_idx, slope, intercept = (np.asarray(e).ravel() for e in (option_idx, slope, intercept))
+    remaining = np.ones(len(option_idx), dtype = bool)
+    layers    = []
+    for _ in range(k):
+        if not remaining.any():
+            break
+        _, _, options = lower_envelope(option_idx[remaining], slope[remaining], intercept[remaining])
+        layers.append(options)
+        remaining &= ~np.isin(option_idx, options)
+    return np.unique(np.concatenate(layers or [np.empty(0, dtype = int)]))
+
+
+def _crossing(idx1, idx2, slope, intercept):
+    return (intercept[idx2] - intercept[idx1]) / (slope[idx1] - slope[idx2])
+
+
+# Checks that every option's curve is concave, i.e. that its slopes are non-increasing, which lower_envelope relies on.
+# slope has shape (n_options, n_segments).
+def is_concave(slope):
+    return bool((np.diff(slope, axis = 1) <= 0).all())
@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+from src import constants
+from src import cost_model
+
+
+
+# Premiums paid to every option in each year of the horizon, with shape (n_options, n_years). The premium of the first
+# year grows by premium_growth every year, a rate (e.g. 0.03 for 3%) common to all options or given for each of them.
+def yearly_premiums(model, n_years, premium_growth = 0.):
+    growth = np.broadcast_to(np.asarray(premium_growth, dtype = float), (len(model),))
+    return 12 * model.cost_per_month[:, None] * (1 + growth[:, None]) ** np.arange(n_years)
+
+
+# Draws paths of yearly health expenses of shape (n_scenarios, n_years) from the distribution of the expenses of a year.
+# Years are drawn independently, and the expenses of each year are scaled by expenses_growth to account for the rising
+# cost of care.
+def expense_paths(distribution, n_years, n_scenarios = constants.HORIZON_SCENARIOS, expenses_growth = 0.,
+                  seed = constants.MONTE_CARLO_SEED):
+    rng = np.random.default_rng(seed)
+    return distribution.sample(rng, n_scenarios * n_years).reshape(n_scenarios, n_years) * (1 + expenses_growth) ** np.arange(n_years)
+
+
+# Projects the costs of every option over paths of health expenses of shape (n_scenarios, n_years), with premiums growing
+# like in yearly_premiums and deducibles and excesses staying the same. Returns the total cost of every option over the
+# horizon in every scenario, with shape (n_options, n_scenarios), and the average cost of every option in each year, with
+# shape (n_options, n_years).
+#
+# Out-of-pocket costs are the cost curves without the premium, so all options, years and scenarios of a chunk are evaluated
+# as one array of shape (n_options, chunk_len, n_years). Scenarios are processed in chunks to keep it bounded in memory.
+def project(model, expenses, premium_growth = 0., chunk_size = constants.EVALUATION_CHUNK_SIZE):
+    expenses = np.asarray(expenses, dtype = float)
+    if expenses.ndim != 2:
+        raise ValueError(f"Programming error: expected expenses of shape (n_scenarios, n_years), got shape: {expenses.shape}.")
+
+    n_options, (n_scenarios, n_years) = len(model), expenses.shape
+    premiums = yearly_premiums(model, n_years, premium_growth)
+    slope, intercept, _, _ = model.segments
+    intercept = intercept - 12 * model.cost_per_month[:, None]
+
+    chunk_len = max(chunk_size // max(n_options * n_years, 1), 1)
+    totals    = np.empty((n_options, n_scenarios))
+    yearly    = np.zeros((n_options, n_years))
+    for start in range(0, n_scenarios, chunk_len):
+        chunk = expenses[start : start + chunk_len]
+        costs = cost_model.concave_costs(slope, intercept, chunk.ravel()).reshape(n_options, len(chunk), n_years)
+        costs += premiums[:, None, :]
+
+        totals[:, start : start + len(chunk)] = costs.sum(axis = 2)
+        yearly += costs.sum(axis = 1)
+    return totals, yearly / max(n_scenarios, 1)
+
+
+# Simulates the costs of every option over a horizon of several years, for paths of expenses drawn from a distribution, and
+# summarizes them in two dataframes:
+# - per option: the average cost of every year and over the horizon, percentiles of the total cost and the probability
+#   that the option is the cheapest over the horizon (ties go to the first option);
+# - per scenario: the total expenses, the cheapest option and its total cost, and how much it saves compared to the option
+#   cheapest on average.
+# The number of scenarios is reduced for many options to bound the total work, like in stochastic.simulate.
+def simulate(model, distribution, n_years, premium_growth = 0., expenses_growth = 0., n_scenarios = constants.HORIZON_SCENARIOS,
+             percentiles = constants.MONTE_CARLO_PERCENTILES, seed = constants.MONTE_CARLO_SEED,
+             chunk_size = constants.EVALUATION_CHUNK_SIZE):
+    n_options   = len(model)
+    n_scenarios = max(min(n_scenarios, constants.MONTE_CARLO_MAX_EVALUATIONS // max(n_options * n_years, 1)), 1)
+
+    expenses = expense_paths(distribution, n_years, n_scenarios, expenses_growth, seed)
+    totals, yearly = project(model, expenses, premium_growth, chunk_size)
+
+    df_options = pd.DataFrame({"label": model.labels})
+    for year in range(n_years):
+        df_options[f"year_{year + 1}"] = yearly[:, year]
+    df_options["expected_total"] = totals.mean(axis = 1)
+    for percentile, values in zip(percentiles, np.percentile(totals, percentiles, axis = 1)):
+        df_options[f"p{percentile}"] = values
+    cheapest = totals.argmin(axis = 0)
+    df_options["probability_cheapest"] = np.bincount(cheapest, minlength = n_options) / n_scenarios
+
+    cheapest_cost = totals[cheapest, np.arange(n_scenarios)]
+    df_scenarios  = pd.DataFrame({"total_expenses": expenses.sum(axis = 1),
+                                  "cheapest"      : model.labels[cheapest],
+                                  "cheapest_cost" : cheapest_cost,
+                                  "savings"       : totals[df_options["expected_total"].argmin()] - cheapest_cost})
+    return df_options, df_scenarios
@@ -0,0 +1,41 @@
+import numpy as np
+
+from src import cost_model
+
+
+
+# A household picks one offer per member, each member having their own offers and range of expected health expenses.
+#
+# Any amount of expenses within the range of a member is taken as equally likely, independently of the other members. The
+# expected cost of the household is then the sum of the expected costs of its members, so its cheapest assignment gives
+# every member the offer with the lowest expected cost of their own, without exploring the combinations of offers.
+
+
+# Returns the index of the chosen offer of every member and the expected total cost of the household. Each member is given
+# as a tuple (df_offers, low, high), where df_offers has the columns of the choices table.
+def optimize(members):
+    models = [cost_model.CostModel.from_dataframe(df_offers) for df_offers, _, _ in members]
+    ranges = [(low, high) for _, low, high in members]
+    if not models or any(len(model) == 0 for model in models):
+        raise ValueError("Every member of the household needs at least one offer.")
+    if any((df_offers[["cost_per_month", "deducible", "excess"]] <= 0).any(axis = None) for df_offers, _, _ in members):
+        raise ValueError("Costs per month, deducibles and excesses must be positive.")
+    if any(low < 0 or high < low for low, high in ranges):
+        raise ValueError("The range of expenses of every member must satisfy 0 <= low <= high.")
+
+    costs   = [expected_costs(model, low, high) for model, (low, high) in zip(models, ranges)]
+    choices = [int(member_costs.argmin()) for member_costs in costs]
+    return choices, float(sum(member_costs[choice] for member_costs, choice in zip(costs, choices)))
+
+
+# Returns the average cost of every option over expenses uniformly distributed in [low, high], or its cost at low when both
+# are equal. Cost curves are linear between their breakpoints, so the trapezoidal rule over the breakpoints within the
+# range is exact.
+def expected_costs(model, low, high):
+    if high <= low:
+        return model.cost_at([low])[:, 0]
+
+    x = np.unique(np.concatenate([[low, high], model.breakpoints[0].ravel()]))
+    x = x[(x >= low) & (x <= high)]
+    costs = model.cost_at(x)
+    return ((costs[:, 1:] + costs[:, :-1]) / 2 * np.diff(x)).sum(axis = 1) / (high - low)
@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+
+from src import cache
+from src import comparison
+from src import cost_model
+from src import crossovers
+from src import envelope
+from src import ranking
+
+
+
+# Comparison of the choices of a session, kept up to date as rows are edited, added or deleted instead of being recomputed
+# from scratch. Only the options among the k cheapest somewhere are ranked, usually a handful of them whatever the number
+# of options, so only the crossovers of every pair of these options are stored. When options change, their crossovers are
+# dropped, and at the next compute the options newly worth it are paired with the others worth it. An edit thus computes
+# the crossovers of a few pairs instead of O(n) ones, and the memory of a session grows with the number of options worth it
+# rather than with the number of pairs of options.
+#
+# Segments only depend on their own option once the flat part of every curve is extended to infinity. The right limit of
+# the plot, which depends on all options, is only applied when computing the result: crossovers beyond it are ignored,
+# exactly like when the flat segments end there. compute returns the same result as comparison.compute_comparison.
+class IncrementalComparison:
+    def __init__(self, labels, values, k = 3):
+        self.k        = k
+        self.labels   = np.empty(0, dtype = object)
+        self.values   = np.empty((0, 3))
+        self._ids     = np.empty(0, dtype = int)
+        self._next_id = 0
+
+        # Crossovers of every pair of the options worth it at the last compute, as flat arrays of the ids of both options and
+        # the health expenses, and the ids of the options whose crossovers are stored.
+        self._pair_a = np.empty(0, dtype = int)
+        self._pair_b = np.empty(0, dtype = int)
+        self._pair_x = np.empty(0)
+        self._paired = np.empty(0, dtype = int)
+
+        self.append(labels, values)
+
+    @classmethod
+    def from_dataframe(cls, df, k = 3):
+        return cls(df["label"].to_numpy(), df[["cost_per_month", "deducible", "excess"]].to_numpy(dtype = float), k = k)
+
+    def __len__(self):
+        return len(self.labels)
+
+    # Same as cache.choices_key of the choices the comparison is currently up to date with.
+    @property
+    def key(self):
+        return cache.offers_key(self.values, self.labels)
+
+    # Replaces the options at the given rows.
+    def update(self, rows, labels, values):
+        rows   = np.asarray(rows, dtype = int)
+        values = np.asarray(values, dtype = float).reshape(len(rows), 3)
+        self.labels[rows] = list(labels)
+
+        # Changing a label does not change any cost.
+        changed = (self.values[rows] != values).any(axis = 1)
+        rows, values = rows[changed], values[changed]
+        if not len(rows):
+            return
+
+        self._remove_pairs(self._ids[rows])
+        self.values[rows] = values
+        self._ids[rows]   = np.arange(self._next_id, self._next_id + len(rows))
+        self._next_id    += len(rows)
+
+    def delete(self, rows):
+        keep = np.ones(len(self), dtype = bool)
+        keep[np.asarray(rows, dtype = int)] = False
+        self._remove_pairs(self._ids[~keep])
+        self.labels, self.values, self._ids = self.labels[keep], self.values[keep], self._ids[keep]
+
+    def append(self, labels, values):
+        labels = np.asarray(list(labels), dtype = object)
+        values = np.asarray(values, dtype = float).reshape(len(labels), 3)
+        self.labels = np.concatenate([self.labels, labels])
+        self.values = np.concatenate([self.values, values])
+        self._ids   = np.concatenate([self._ids, np.arange(self._next_id, self._next_id + len(labels))])
+        self._next_id += len(labels)
+
+    # Returns the points and the ranking index of the options worth it, and the labels of the others, like
+    # comparison.compute_comparison.
+    def compute(self):
+        # Like the full pipeline, which identifies options by their labels, the comparison needs unique labels. Options with
+        # missing values have no segments, and are left to the full pipeline.
+        if len(set(self.labels)) < len(self):
+            raise ValueError("Labels of the options must be unique.")
+        if not np.isfinite(self.values).all():
+            return comparison.compute_comparison(pd.DataFrame({"label"         : pd.Series(self.labels, dtype = object),
+                                                               "cost_per_month": self.values[:, 0],
+                                                               "deducible"     : self.values[:, 1],
+                                                               "excess"        : self.values[:, 2]}), self.k)
+
+        model = cost_model.CostModel(self.labels, self.values[:, 0], self.values[:, 1], self.values[:, 2])
+        x, y  = model.breakpoints
+        slope, intercept, _, _ = model.segments
+        worth_it = np.arange(len(self))
+        if envelope.is_concave(slope):
+            worth_it = envelope.top_layers(np.repeat(worth_it, slope.shape[1]), slope, intercept, self.k)
+
+        self._pair(worth_it)
+        intersections = crossovers.unique_within_tolerance(self._pair_x[self._pair_x <= x[:, -1].max()]).tolist()
+
+        never_worth_it = np.ones(len(self), dtype = bool)
+        never_worth_it[worth_it] = False
+
+        labels, x, y = self.labels[worth_it], x[worth_it], y[worth_it]
+        df_points = pd.DataFrame({"label"             : np.repeat(labels, x.shape[1]),
+                                  "health_expenses"   : x.ravel(),
+                                  "money_to_insurance": y.ravel()})
+        return df_points, ranking.RankingIndex(labels, x, y, intersections), self.labels[never_worth_it].tolist()
+
+    def _remove_pairs(self, ids):
+        keep = ~(np.isin(self._pair_a, ids) | np.isin(self._pair_b, ids))
+        self._pair_a, self._pair_b, self._pair_x = self._pair_a[keep], self._pair_b[keep], self._pair_x[keep]
+        self._paired = self._paired[~np.isin(self._paired, ids)]
+
+    # Makes the stored crossovers those of every pair of the options at the given rows: drops the crossovers of the options
+    # not among them anymore, and adds those of the options not paired yet with all the others (once per pair).
+    def _pair(self, rows):
+        ids = self._ids[rows]
+        self._remove_pairs(self._paired[~np.isin(self._paired, ids)])
+        new_rows = rows[~np.isin(ids, self._paired)]
+        if not len(new_rows):
+            return
+
+        pairs = _crossovers(new_rows, rows, self._ids, self.values)
+        self._pair_a, self._pair_b, self._pair_x = (np.concatenate([old, new]) for old, new in zip((self._pair_a, self._pair_b, self._pair_x), pairs))
+        self._paired = np.concatenate([self._paired, self._ids[new_rows]])
+
+
+# Segments of options given as a (n, 3) array of cost_per_month, deducible and excess, with the flat ones extended to
+# infinity.
+def _segments(values):
+    model = cost_model.CostModel(np.arange(len(values)), values[:, 0], values[:, 1], values[:, 2])
+    slope, intercept, x_min, x_max = (e.copy() for e in model.segments)
+    x_max[:, -1] = np.inf
+    return slope, intercept, x_min, x_max
+
+
+# Crossovers of the segments of the options at rows with those of the options at others, computed like in
+# crossovers.find_crossovers. Pairs of two of the rows are only kept once. Returns the ids of both options and the health
+# expenses of each crossover.
+def _crossovers(rows, others, ids, values):
+    rank = np.full(len(ids), -1)
+    rank[rows] = np.arange(len(rows))
+
+    segments, other_segments = _segments(values[rows]), _segments(values[others])
+    x_inter = crossovers.segment_crossovers(*(e[:, None, :, None] for e in segments), *(e[None, :, None, :] for e in other_segments))
+    mask = ~np.isnan(x_inter) & (rank[others][None, :] < np.arange(len(rows))[:, None])[None, :, :, None, None]
+
+    _, row, other, _, _ = np.nonzero(mask)
+    return ids[rows[row]], ids[others[other]], x_inter[mask]
@@ -1,4 +1,5 @@
 from enum import IntEnum
+from types import MappingProxyType
 
 
 Languages = IntEnum("Languages", ["EN", "FR", "IT", "DE"])
@@ -75,11 +76,11 @@ _TRANSLATIONS = {
         Languages.DE: "Versicherungsparameter",
     },
 
-    "add_row_button": {
-        Languages.EN: "Add a row",
-        Languages.FR: "Ajouter une ligne",
-        Languages.IT: "Aggiungere una linea",
-        Languages.DE: "Zeile hinzufügen",
+    "insurance_parameters_editor_help": {
+        Languages.EN: "Edit the cells of the table directly. Add an option with the row at the bottom of the table, delete options by selecting their rows.",
+        Languages.FR: "Modifiez directement les cellules du tableau. Ajoutez une option avec la ligne en bas du tableau, supprimez des options en sélectionnant leurs lignes.",
+        Languages.IT: "Modificate direttamente le celle della tabella. Aggiungete un'opzione con la riga in fondo alla tabella, eliminate delle opzioni selezionandone le righe.",
+        Languages.DE: "Bearbeiten Sie die Zellen der Tabelle direkt. Fügen Sie eine Option mit der Zeile am Ende der Tabelle hinzu, löschen Sie Optionen, indem Sie ihre Zeilen auswählen.",
     },
 
     "comparison": {
@@ -176,6 +177,13 @@ _TRANSLATIONS = {
                          beste ist, um Geld zu sparen.""",
     },
 
+    "never_worth_it": {
+        Languages.EN: "These options are never among the 3 cheapest, whatever your medical expenses, and are not shown: {}.",
+        Languages.FR: "Ces options ne sont jamais parmi les 3 moins chères, quelles que soient vos dépenses médicales, et ne sont pas affichées: {}.",
+        Languages.IT: "Queste opzioni non sono mai tra le 3 meno care, qualunque siano le sue spese mediche, e non sono mostrate: {}.",
+        Languages.DE: "Diese Optionen gehören nie zu den 3 günstigsten, unabhängig von Ihren medizinischen Ausgaben, und werden nicht angezeigt: {}.",
+    },
+
     "comparison_plot_explaination": {
         Languages.EN: """This plot shows you how each offer compares at any amount of yearly medical expenses.
                          The plot is interactive, try it out!""",
@@ -187,6 +195,464 @@ _TRANSLATIONS = {
                          medizinischen Ausgaben verhält. Das Diagramm ist interaktiv, probieren Sie es aus!""",
     },
 
+    "show_section": {
+        Languages.EN: "Show",
+        Languages.FR: "Afficher",
+        Languages.IT: "Mostra",
+        Languages.DE: "Anzeigen",
+    },
+
+    "multi_year_needs_distribution": {
+        Languages.EN: "Show the expected cost above and describe your medical expenses there first.",
+        Languages.FR: "Affichez d'abord le coût attendu ci-dessus et décrivez-y vos dépenses médicales.",
+        Languages.IT: "Mostri prima il costo atteso qui sopra e vi descriva le sue spese mediche.",
+        Languages.DE: "Zeigen Sie zuerst die erwarteten Kosten oben an und beschreiben Sie dort Ihre medizinischen Ausgaben.",
+    },
+
+    "sensitivity": {
+        Languages.EN: "What If an Offer Changed?",
+        Languages.FR: "Et Si une Offre Changeait?",
+        Languages.IT: "E Se un'Offerta Cambiasse?",
+        Languages.DE: "Was Wäre, Wenn sich ein Angebot Ändern Würde?",
+    },
+
+    "sensitivity_explaination": {
+        Languages.EN: """Choose an offer and two of its parameters: the map shows, for every combination of their values,
+                         over how much medical expenses the offer would be the cheapest of all. For example, it tells how
+                         much its cost per month would have to drop before it becomes worth it. The cross marks the
+                         offer as it is today.""",
+        Languages.FR: """Choisissez une offre et deux de ses paramètres: la carte montre, pour chaque combinaison de leurs
+                         valeurs, sur combien de dépenses médicales l'offre serait la moins chère de toutes. Par exemple,
+                         elle indique de combien son coût par mois devrait baisser pour qu'elle en vaille la peine. La
+                         croix marque l'offre telle qu'elle est aujourd'hui.""",
+        Languages.IT: """Scelga un'offerta e due dei suoi parametri: la mappa mostra, per ogni combinazione dei loro valori,
+                         su quante spese mediche l'offerta sarebbe la meno cara di tutte. Per esempio, indica di quanto
+                         dovrebbe scendere il suo costo al mese perché ne valga la pena. La croce indica l'offerta come é
+                         oggi.""",
+        Languages.DE: """Wählen Sie ein Angebot und zwei seiner Parameter: die Karte zeigt für jede Kombination ihrer Werte,
+                         über wie viele medizinische Ausgaben das Angebot das günstigste von allen wäre. Sie zeigt zum
+                         Beispiel, um wie viel die Kosten pro Monat sinken müssten, damit es sich lohnt. Das Kreuz
+                         markiert das Angebot, wie es heute ist.""",
+    },
+
+    "sensitivity_option": {
+        Languages.EN: "Offer",
+        Languages.FR: "Offre",
+        Languages.IT: "Offerta",
+        Languages.DE: "Angebot",
+    },
+
+    "sensitivity_x_parameter": {
+        Languages.EN: "Horizontal axis",
+        Languages.FR: "Axe horizontal",
+        Languages.IT: "Asse orizzontale",
+        Languages.DE: "Horizontale Achse",
+    },
+
+    "sensitivity_y_parameter": {
+        Languages.EN: "Vertical axis",
+        Languages.FR: "Axe vertical",
+        Languages.IT: "Asse verticale",
+        Languages.DE: "Vertikale Achse",
+    },
+
+    "sensitivity_colorbar": {
+        Languages.EN: "Cheapest over<br>CHF of expenses",
+        Languages.FR: "Moins chère sur<br>CHF de dépenses",
+        Languages.IT: "Meno cara su<br>CHF di spese",
+        Languages.DE: "Am günstigsten über<br>CHF an Ausgaben",
+    },
+
+    "sensitivity_hover_template": {
+        Languages.EN: "{}: %{{x:,.2f}} CHF<br>{}: %{{y:,.2f}} CHF<br>Cheapest over %{{z:,.0f}} CHF of medical expenses,<br>starting at %{{customdata:,.0f}} CHF<extra></extra>",
+        Languages.FR: "{}: %{{x:,.2f}} CHF<br>{}: %{{y:,.2f}} CHF<br>Moins chère sur %{{z:,.0f}} CHF de dépenses médicales,<br>à partir de %{{customdata:,.0f}} CHF<extra></extra>",
+        Languages.IT: "{}: %{{x:,.2f}} CHF<br>{}: %{{y:,.2f}} CHF<br>Meno cara su %{{z:,.0f}} CHF di spese mediche,<br>a partire da %{{customdata:,.0f}} CHF<extra></extra>",
+        Languages.DE: "{}: %{{x:,.2f}} CHF<br>{}: %{{y:,.2f}} CHF<br>Am günstigsten über %{{z:,.0f}} CHF an medizinischen Ausgaben,<br>ab %{{customdata:,.0f}} CHF<extra></extra>",
+    },
+
+    "sensitivity_current": {
+        Languages.EN: "Today",
+        Languages.FR: "Aujourd'hui",
+        Languages.IT: "Oggi",
+        Languages.DE: "Heute",
+    },
+
+    "expected_cost": {
+        Languages.EN: "Expected Cost",
+        Languages.FR: "Coût Attendu",
+        Languages.IT: "Costo Atteso",
+        Languages.DE: "Erwartete Kosten",
+    },
+
+    "expected_cost_explaination": {
+        Languages.EN: """You probably do not know your medical expenses of next year in advance. Describe how likely each
+                         amount is, and a simulation of up to a million years (fewer when comparing many offers) will
+                         tell you how much each offer costs on average, in good and bad years, and how often it is the
+                         cheapest.""",
+        Languages.FR: """Vous ne connaissez sans doute pas vos dépenses médicales de l'année prochaine à l'avance. Décrivez
+                         la probabilité de chaque montant, et une simulation de jusqu'à un million d'années (moins en
+                         comparant beaucoup d'offres) vous dira combien chaque offre coûte en moyenne, les bonnes et les
+                         mauvaises années, et à quelle fréquence elle est la moins chère.""",
+        Languages.IT: """Probabilmente non conosce in anticipo le sue spese mediche dell'anno prossimo. Descriva la
+                         probabilità di ogni importo, e una simulazione fino a un milione di anni (meno confrontando
+                         molte offerte) le dirà quanto costa ogni offerta in media, negli anni buoni e cattivi, e quanto
+                         spesso é la meno cara.""",
+        Languages.DE: """Sie kennen Ihre medizinischen Ausgaben des nächsten Jahres wahrscheinlich nicht im Voraus.
+                         Beschreiben Sie, wie wahrscheinlich jeder Betrag ist, und eine Simulation von bis zu einer
+                         Million Jahren (weniger beim Vergleich vieler Angebote) zeigt Ihnen, wie viel jedes Angebot im
+                         Durchschnitt, in guten und schlechten Jahren kostet und wie oft es am günstigsten ist.""",
+    },
+
+    "distribution": {
+        Languages.EN: "Medical expenses",
+        Languages.FR: "Dépenses médicales",
+        Languages.IT: "Spese mediche",
+        Languages.DE: "Medizinische Ausgaben",
+    },
+
+    "distribution_lognormal": {
+        Languages.EN: "Around a typical amount",
+        Languages.FR: "Autour d'un montant typique",
+        Languages.IT: "Intorno a un importo tipico",
+        Languages.DE: "Um einen typischen Betrag",
+    },
+
+    "distribution_zero_inflated": {
+        Languages.EN: "Often none, otherwise around a typical amount",
+        Languages.FR: "Souvent aucune, sinon autour d'un montant typique",
+        Languages.IT: "Spesso nessuna, altrimenti intorno a un importo tipico",
+        Languages.DE: "Oft keine, sonst um einen typischen Betrag",
+    },
+
+    "distribution_histogram": {
+        Languages.EN: "From a histogram file",
+        Languages.FR: "D'un fichier d'histogramme",
+        Languages.IT: "Da un file di istogramma",
+        Languages.DE: "Aus einer Histogramm-Datei",
+    },
+
+    "typical_expenses": {
+        Languages.EN: "Typical medical expenses, in CHF per year",
+        Languages.FR: "Dépenses médicales typiques, en CHF par année",
+        Languages.IT: "Spese mediche tipiche, in CHF per anno",
+        Languages.DE: "Typische medizinische Ausgaben, in CHF pro Jahr",
+    },
+
+    "expenses_spread": {
+        Languages.EN: "Spread of the medical expenses (0 means always the typical amount)",
+        Languages.FR: "Dispersion des dépenses médicales (0 signifie toujours le montant typique)",
+        Languages.IT: "Dispersione delle spese mediche (0 significa sempre l'importo tipico)",
+        Languages.DE: "Streuung der medizinischen Ausgaben (0 bedeutet immer der typische Betrag)",
+    },
+
+    "probability_no_expenses": {
+        Languages.EN: "Probability of having no medical expenses",
+        Languages.FR: "Probabilité de n'avoir aucune dépense médicale",
+        Languages.IT: "Probabilità di non avere spese mediche",
+        Languages.DE: "Wahrscheinlichkeit, keine medizinischen Ausgaben zu haben",
+    },
+
+    "histogram_file": {
+        Languages.EN: "Histogram of medical expenses (CSV or Parquet file with columns bin_start, bin_end, count)",
+        Languages.FR: "Histogramme des dépenses médicales (fichier CSV ou Parquet avec les colonnes bin_start, bin_end, count)",
+        Languages.IT: "Istogramma delle spese mediche (file CSV o Parquet con le colonne bin_start, bin_end, count)",
+        Languages.DE: "Histogramm der medizinischen Ausgaben (CSV- oder Parquet-Datei mit den Spalten bin_start, bin_end, count)",
+    },
+
+    "error_histogram": {
+        Languages.EN: "The histogram could not be read: {}",
+        Languages.FR: "L'histogramme n'a pas pu être lu: {}",
+        Languages.IT: "Non é stato possibile leggere l'istogramma: {}",
+        Languages.DE: "Das Histogramm konnte nicht gelesen werden: {}",
+    },
+
+    "colname_expected_cost": {
+        Languages.EN: "Average cost, in CHF per year",
+        Languages.FR: "Coût moyen, en CHF par année",
+        Languages.IT: "Costo medio, in CHF per anno",
+        Languages.DE: "Durchschnittliche Kosten, in CHF pro Jahr",
+    },
+
+    "colname_percentile": {
+        Languages.EN: "At most this cost in {}% of years",
+        Languages.FR: "Coût maximal dans {}% des années",
+        Languages.IT: "Costo massimo nel {}% degli anni",
+        Languages.DE: "Höchstkosten in {}% der Jahre",
+    },
+
+    "colname_probability_cheapest": {
+        Languages.EN: "Cheapest in % of years",
+        Languages.FR: "Moins chère dans % des années",
+        Languages.IT: "Meno cara nel % degli anni",
+        Languages.DE: "Am günstigsten in % der Jahre",
+    },
+
+    "multi_year": {
+        Languages.EN: "Over Several Years",
+        Languages.FR: "Sur Plusieurs Années",
+        Languages.IT: "Su Più Anni",
+        Languages.DE: "Über Mehrere Jahre",
+    },
+
+    "multi_year_explaination": {
+        Languages.EN: """Premiums rise almost every year, and a bad year rarely comes alone. With the medical expenses
+                         described above, thousands of scenarios of several years show how much each offer costs over
+                         the whole period and how often it is the cheapest, if you keep it all along.""",
+        Languages.FR: """Les primes augmentent presque chaque année, et une mauvaise année vient rarement seule. Avec les
+                         dépenses médicales décrites ci-dessus, des milliers de scénarios de plusieurs années montrent
+                         combien chaque offre coûte sur toute la période et à quelle fréquence elle est la moins chère,
+                         si vous la gardez tout du long.""",
+        Languages.IT: """I premi aumentano quasi ogni anno, e un anno cattivo raramente viene da solo. Con le spese mediche
+                         descritte sopra, migliaia di scenari di più anni mostrano quanto costa ogni offerta sull'intero
+                         periodo e quanto spesso é la meno cara, se la mantiene per tutto il tempo.""",
+        Languages.DE: """Die Prämien steigen fast jedes Jahr, und ein schlechtes Jahr kommt selten allein. Mit den oben
+                         beschriebenen medizinischen Ausgaben zeigen tausende Szenarien über mehrere Jahre, wie viel jedes
+                         Angebot über den ganzen Zeitraum kostet und wie oft es am günstigsten ist, wenn Sie es die ganze
+                         Zeit behalten.""",
+    },
+
+    "multi_year_n_years": {
+        Languages.EN: "Number of years",
+        Languages.FR: "Nombre d'années",
+        Languages.IT: "Numero di anni",
+        Languages.DE: "Anzahl Jahre",
+    },
+
+    "premium_growth": {
+        Languages.EN: "Premium growth, in % per year",
+        Languages.FR: "Hausse des primes, en % par année",
+        Languages.IT: "Aumento dei premi, in % per anno",
+        Languages.DE: "Prämienanstieg, in % pro Jahr",
+    },
+
+    "expenses_growth": {
+        Languages.EN: "Medical expenses growth, in % per year",
+        Languages.FR: "Hausse des dépenses médicales, en % par année",
+        Languages.IT: "Aumento delle spese mediche, in % per anno",
+        Languages.DE: "Anstieg der medizinischen Ausgaben, in % pro Jahr",
+    },
+
+    "colname_year": {
+        Languages.EN: "Average cost in year {}, in CHF",
+        Languages.FR: "Coût moyen l'année {}, en CHF",
+        Languages.IT: "Costo medio nell'anno {}, in CHF",
+        Languages.DE: "Durchschnittliche Kosten im Jahr {}, in CHF",
+    },
+
+    "colname_expected_total": {
+        Languages.EN: "Average total cost, in CHF",
+        Languages.FR: "Coût total moyen, en CHF",
+        Languages.IT: "Costo totale medio, in CHF",
+        Languages.DE: "Durchschnittliche Gesamtkosten, in CHF",
+    },
+
+    "colname_percentile_total": {
+        Languages.EN: "At most this total in {}% of scenarios",
+        Languages.FR: "Total maximal dans {}% des scénarios",
+        Languages.IT: "Totale massimo nel {}% degli scenari",
+        Languages.DE: "Höchstens dieser Gesamtbetrag in {}% der Szenarien",
+    },
+
+    "colname_probability_cheapest_total": {
+        Languages.EN: "Cheapest in % of scenarios",
+        Languages.FR: "Moins chère dans % des scénarios",
+        Languages.IT: "Meno cara nel % degli scenari",
+        Languages.DE: "Am günstigsten in % der Szenarien",
+    },
+
+    "multi_year_plot_explaination": {
+        Languages.EN: """Each point is a scenario, colored by the offer that is the cheapest over its years. Hover over it
+                         to see how much that offer saves compared to the offer cheapest on average.""",
+        Languages.FR: """Chaque point est un scénario, coloré selon l'offre la moins chère sur ses années. Survolez-le pour
+                         voir combien cette offre économise par rapport à l'offre la moins chère en moyenne.""",
+        Languages.IT: """Ogni punto é uno scenario, colorato secondo l'offerta meno cara sui suoi anni. Passi sopra con il
+                         mouse per vedere quanto risparmia questa offerta rispetto all'offerta meno cara in media.""",
+        Languages.DE: """Jeder Punkt ist ein Szenario, gefärbt nach dem Angebot, das über seine Jahre am günstigsten ist.
+                         Fahren Sie darüber, um zu sehen, wie viel dieses Angebot gegenüber dem im Durchschnitt
+                         günstigsten Angebot spart.""",
+    },
+
+    "multi_year_total_expenses": {
+        Languages.EN: "Total medical expenses over the years, in CHF",
+        Languages.FR: "Dépenses médicales totales sur les années, en CHF",
+        Languages.IT: "Spese mediche totali sugli anni, in CHF",
+        Languages.DE: "Gesamte medizinische Ausgaben über die Jahre, in CHF",
+    },
+
+    "multi_year_cheapest_cost": {
+        Languages.EN: "Total cost of the cheapest offer, in CHF",
+        Languages.FR: "Coût total de l'offre la moins chère, en CHF",
+        Languages.IT: "Costo totale dell'offerta meno cara, in CHF",
+        Languages.DE: "Gesamtkosten des günstigsten Angebots, in CHF",
+    },
+
+    "multi_year_hover_template": {
+        Languages.EN: "Medical expenses: %{x:,.0f} CHF<br>Total cost: %{y:,.0f} CHF<br>Saves %{customdata:,.0f} CHF compared to the offer cheapest on average",
+        Languages.FR: "Dépenses médicales: %{x:,.0f} CHF<br>Coût total: %{y:,.0f} CHF<br>Économise %{customdata:,.0f} CHF par rapport à l'offre la moins chère en moyenne",
+        Languages.IT: "Spese mediche: %{x:,.0f} CHF<br>Costo totale: %{y:,.0f} CHF<br>Risparmia %{customdata:,.0f} CHF rispetto all'offerta meno cara in media",
+        Languages.DE: "Medizinische Ausgaben: %{x:,.0f} CHF<br>Gesamtkosten: %{y:,.0f} CHF<br>Spart %{customdata:,.0f} CHF gegenüber dem im Durchschnitt günstigsten Angebot",
+    },
+
+    "household": {
+        Languages.EN: "Household",
+        Languages.FR: "Ménage",
+        Languages.IT: "Nucleo Familiare",
+        Languages.DE: "Haushalt",
+    },
+
+    "household_explaination": {
+        Languages.EN: """Families pick an offer for each member. Give the offers and the range of expected medical expenses
+                         of every member: assuming any amount within the range is as likely as any other, the choice
+                         below is the one with which the household pays the least on average.""",
+        Languages.FR: """Les familles choisissent une offre pour chaque membre. Indiquez les offres et la fourchette des
+                         dépenses médicales attendues de chaque membre: en supposant que tout montant de la fourchette
+                         est aussi probable qu'un autre, le choix ci-dessous est celui avec lequel le ménage paie le
+                         moins en moyenne.""",
+        Languages.IT: """Le famiglie scelgono un'offerta per ogni membro. Indichi le offerte e l'intervallo delle spese
+                         mediche attese di ogni membro: supponendo che ogni importo dell'intervallo sia probabile quanto
+                         un altro, la scelta qui sotto é quella con cui il nucleo familiare paga meno in media.""",
+        Languages.DE: """Familien wählen ein Angebot für jedes Mitglied. Geben Sie die Angebote und den Bereich der
+                         erwarteten medizinischen Ausgaben jedes Mitglieds an: unter der Annahme, dass jeder Betrag im
+                         Bereich gleich wahrscheinlich ist, ist die untenstehende Wahl diejenige, mit der der Haushalt
+                         im Durchschnitt am wenigsten bezahlt.""",
+    },
+
+    "household_n_members": {
+        Languages.EN: "Number of members",
+        Languages.FR: "Nombre de membres",
+        Languages.IT: "Numero di membri",
+        Languages.DE: "Anzahl Mitglieder",
+    },
+
+    "household_member": {
+        Languages.EN: "Member {}",
+        Languages.FR: "Membre {}",
+        Languages.IT: "Membro {}",
+        Languages.DE: "Mitglied {}",
+    },
+
+    "household_expenses_low": {
+        Languages.EN: "Medical expenses in a good year, in CHF",
+        Languages.FR: "Dépenses médicales d'une bonne année, en CHF",
+        Languages.IT: "Spese mediche in un anno buono, in CHF",
+        Languages.DE: "Medizinische Ausgaben in einem guten Jahr, in CHF",
+    },
+
+    "household_expenses_high": {
+        Languages.EN: "Medical expenses in a bad year, in CHF",
+        Languages.FR: "Dépenses médicales d'une mauvaise année, en CHF",
+        Languages.IT: "Spese mediche in un anno cattivo, in CHF",
+        Languages.DE: "Medizinische Ausgaben in einem schlechten Jahr, in CHF",
+    },
+
+    "household_colname_member": {
+        Languages.EN: "Member",
+        Languages.FR: "Membre",
+        Languages.IT: "Membro",
+        Languages.DE: "Mitglied",
+    },
+
+    "household_colname_offer": {
+        Languages.EN: "Cheapest offer on average",
+        Languages.FR: "Offre la moins chère en moyenne",
+        Languages.IT: "Offerta meno cara in media",
+        Languages.DE: "Im Durchschnitt günstigstes Angebot",
+    },
+
+    "household_colname_expected_cost": {
+        Languages.EN: "Average cost, in CHF",
+        Languages.FR: "Coût moyen, en CHF",
+        Languages.IT: "Costo medio, in CHF",
+        Languages.DE: "Durchschnittliche Kosten, in CHF",
+    },
+
+    "household_colname_cost_low": {
+        Languages.EN: "Cost in a good year, in CHF",
+        Languages.FR: "Coût d'une bonne année, en CHF",
+        Languages.IT: "Costo in un anno buono, in CHF",
+        Languages.DE: "Kosten in einem guten Jahr, in CHF",
+    },
+
+    "household_colname_cost_high": {
+        Languages.EN: "Cost in a bad year, in CHF",
+        Languages.FR: "Coût d'une mauvaise année, en CHF",
+        Languages.IT: "Costo in un anno cattivo, in CHF",
+        Languages.DE: "Kosten in einem schlechten Jahr, in CHF",
+    },
+
+    "household_expected_total": {
+        Languages.EN: "On average, the household pays {} CHF per year with these offers.",
+        Languages.FR: "En moyenne, le ménage paie {} CHF par an avec ces offres.",
+        Languages.IT: "In media, il nucleo familiare paga {} CHF all'anno con queste offerte.",
+        Languages.DE: "Im Durchschnitt zahlt der Haushalt mit diesen Angeboten {} CHF pro Jahr.",
+    },
+
+    "error_household": {
+        Languages.EN: "The household could not be optimized: {}",
+        Languages.FR: "Le ménage n'a pas pu être optimisé: {}",
+        Languages.IT: "Non é stato possibile ottimizzare il nucleo familiare: {}",
+        Languages.DE: "Der Haushalt konnte nicht optimiert werden: {}",
+    },
+
+    "market_comparison": {
+        Languages.EN: "Comparison of the Whole Market",
+        Languages.FR: "Comparaison de Tout le Marché",
+        Languages.IT: "Confronto di Tutto il Mercato",
+        Languages.DE: "Vergleich des Gesamten Marktes",
+    },
+
+    "market_comparison_explaination": {
+        Languages.EN: """If you have a premium catalog with the offers of all insurers (a CSV or Parquet file with columns
+                         insurer, model, region, age_band, deducible, cost_per_month and optionally excess), you can
+                         upload it here to find which of all the offers of your region is the cheapest for you.""",
+        Languages.FR: """Si vous avez un catalogue de primes avec les offres de tous les assureurs (un fichier CSV ou Parquet
+                         avec les colonnes insurer, model, region, age_band, deducible, cost_per_month et optionnellement
+                         excess), vous pouvez le charger ici pour savoir laquelle de toutes les offres de votre région
+                         est la moins chère pour vous.""",
+        Languages.IT: """Se ha un catalogo dei premi con le offerte di tutti gli assicuratori (un file CSV o Parquet con le
+                         colonne insurer, model, region, age_band, deducible, cost_per_month e facoltativamente excess),
+                         può caricarlo qui per sapere quale di tutte le offerte della sua regione é la meno cara per lei.""",
+        Languages.DE: """Wenn Sie einen Prämienkatalog mit den Angeboten aller Versicherer haben (eine CSV- oder
+                         Parquet-Datei mit den Spalten insurer, model, region, age_band, deducible, cost_per_month und
+                         optional excess), können Sie ihn hier hochladen, um herauszufinden, welches aller Angebote
+                         Ihrer Region für Sie am günstigsten ist.""",
+    },
+
+    "catalog_file": {
+        Languages.EN: "Premium catalog",
+        Languages.FR: "Catalogue de primes",
+        Languages.IT: "Catalogo dei premi",
+        Languages.DE: "Prämienkatalog",
+    },
+
+    "region": {
+        Languages.EN: "Region",
+        Languages.FR: "Région",
+        Languages.IT: "Regione",
+        Languages.DE: "Region",
+    },
+
+    "age_band": {
+        Languages.EN: "Age band",
+        Languages.FR: "Tranche d'âge",
+        Languages.IT: "Fascia d'età",
+        Languages.DE: "Altersgruppe",
+    },
+
+    "market_n_offers": {
+        Languages.EN: "{} offers were compared.",
+        Languages.FR: "{} offres ont été comparées.",
+        Languages.IT: "{} offerte sono state confrontate.",
+        Languages.DE: "{} Angebote wurden verglichen.",
+    },
+
+    "error_catalog": {
+        Languages.EN: "The premium catalog could not be read: {}",
+        Languages.FR: "Le catalogue de primes n'a pas pu être lu: {}",
+        Languages.IT: "Non é stato possibile leggere il catalogo dei premi: {}",
+        Languages.DE: "Der Prämienkatalog konnte nicht gelesen werden: {}",
+    },
+
     "health_expenses_plot": {
         Languages.EN: "Medical Expenses, in CHF per year",
         Languages.FR: "Dépenses Médicales, en CHF par année",
@@ -216,10 +682,10 @@ _TRANSLATIONS = {
     },
 
     "hover_template": {
-        Languages.EN: "%{customdata}: %{y} CHF per year<extra></extra>",
-        Languages.FR: "%{customdata}: %{y} CHF par année<extra></extra>",
-        Languages.IT: "%{customdata}: %{y} CHF per anno<extra></extra>",
-        Languages.DE: "%{customdata}: %{y} CHF pro Jahr<extra></extra>",
+        Languages.EN: "%{fullData.name}: %{y} CHF per year<extra></extra>",
+        Languages.FR: "%{fullData.name}: %{y} CHF par année<extra></extra>",
+        Languages.IT: "%{fullData.name}: %{y} CHF per anno<extra></extra>",
+        Languages.DE: "%{fullData.name}: %{y} CHF pro Jahr<extra></extra>",
     },
 }
 
@@ -228,7 +694,7 @@ _current_language = Languages.EN
 
 
 def get_text(string):
-    return _TRANSLATIONS[string][_current_language]
+    return _current_table[string]
 
 
 def get_lang():
@@ -236,12 +702,13 @@ def get_lang():
 
 
 def set_lang(language):
-    global _current_language
+    global _current_language, _current_table
 
     if language not in Languages:
         raise ValueError(f"Programming error: unrecognized value for language selected: {language}")
 
     _current_language = language
+    _current_table    = _TABLES[language]
 
 
 # Simple validation translations were done correctly.
@@ -250,4 +717,11 @@ def _check_translations():
         for language in Languages:
             if language not in translations or translations[language].strip() == "":
                 raise RuntimeError(f"Programming error: missing translations were detected.")
-_check_translations()
\ No newline at end of file
+_check_translations()
+
+
+# Translations are validated once at import, then frozen into one flat read-only table per language, so that get_text is a
+# single dictionary lookup.
+_TABLES = {language: MappingProxyType({string: translations[language] for string, translations in _TRANSLATIONS.items()})
+           for language in Languages}
+_current_table = _TABLES[_current_language]
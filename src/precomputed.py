@@ -0,0 +1,121 @@
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import comparison
+from src import constants
+
+
+
+# Precomputed comparisons of common sets of offers, built offline by precompute_comparisons.py, so that the app can serve
+# them without running the pipeline. An artifact is a directory holding a manifest and one Parquet file per kind of result,
+# all keyed by cache.choices_key of the set of offers:
+# - rankings.parquet: the ranking table, one row per range of health expenses, with the k cheapest options of the manifest.
+# - sets.parquet    : the options dropped as never worth it, and the breakpoints of the cost curves of the others. The plot
+#                     is drawn from them when served, in the language of the user.
+ARTIFACT_VERSION = 2
+MANIFEST_FILE    = "manifest.json"
+
+
+def write(directory, entries, k = 3):
+    directory = Path(directory)
+    directory.mkdir(parents = True, exist_ok = True)
+
+    rankings, sets = [], []
+    for key, df_ranking, never_worth_it, (labels, x, y) in entries:
+        rankings.append(df_ranking.assign(key = key))
+        sets    .append({"key"           : key,
+                         "never_worth_it": list(never_worth_it),
+                         "labels"        : list(labels),
+                         "x"             : np.asarray(x, dtype = float).ravel(),
+                         "y"             : np.asarray(y, dtype = float).ravel()})
+
+    rank_columns = comparison.ranking_columns(k)
+    df_rankings  = pd.concat(rankings, ignore_index = True) if rankings else pd.DataFrame(columns = ["key", "start", "end"] + rank_columns)
+    df_rankings  = df_rankings[["key", "start", "end"] + rank_columns].astype({e: "string" for e in rank_columns})
+    tables = {"rankings": df_rankings,
+              "sets"    : pd.DataFrame(sets, columns = ["key", "never_worth_it", "labels", "x", "y"])}
+    for name, df in tables.items():
+        df.to_parquet(directory / f"{name}.parquet", index = False, compression = "zstd")
+
+    manifest = {"version": ARTIFACT_VERSION,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "n_sets" : len(sets),
+                "k"      : k}
+    (directory / MANIFEST_FILE).write_text(json.dumps(manifest, indent = 2) + "\n")
+
+
+class Artifact:
+    def __init__(self, directory, k = 3):
+        directory = Path(directory)
+        self.manifest = json.loads((directory / MANIFEST_FILE).read_text())
+        if self.manifest.get("version") != ARTIFACT_VERSION:
+            raise ValueError(f"Unsupported precomputed artifact version {self.manifest.get('version')}, expected {ARTIFACT_VERSION}.")
+        # Ranking tables with another number of options would not match the ones computed live.
+        if self.manifest.get("k") != k:
+            raise ValueError(f"Precomputed rankings list {self.manifest.get('k')} options, expected {k}.")
+
+        self._rankings       = pd.read_parquet(directory / "rankings.parquet")
+        self._rankings_index = _slices_by_key(self._rankings["key"])
+
+        df_sets = pd.read_parquet(directory / "sets.parquet")
+        self._never_worth_it = dict(zip(df_sets["key"], (list(e) for e in df_sets["never_worth_it"])))
+        self._breakpoints    = {key: (np.asarray(labels, dtype = object), x.reshape(len(labels), -1), y.reshape(len(labels), -1))
+                                for key, labels, x, y in zip(df_sets["key"], df_sets["labels"], df_sets["x"], df_sets["y"])}
+
+    def __len__(self):
+        return len(self._never_worth_it)
+
+    def __contains__(self, key):
+        return key in self._never_worth_it
+
+    # Returns the ranking table, the options never worth it and the labels and breakpoints (x, y) of the other options of a
+    # set of offers, or None if it was not precomputed.
+    def lookup(self, key):
+        if key not in self._never_worth_it:
+            return None
+        df_ranking = self._rankings.iloc[self._rankings_index[key]].drop(columns = "key").reset_index(drop = True)
+        for col_name in df_ranking.columns[2:]:
+            df_ranking[col_name] = df_ranking[col_name].astype(object).where(df_ranking[col_name].notna(), None)
+        return df_ranking, self._never_worth_it[key], self._breakpoints[key]
+
+
+# Rows of each key are contiguous since they are written set by set.
+def _slices_by_key(keys):
+    keys   = keys.to_numpy()
+    starts = np.flatnonzero(np.concatenate([[True], keys[1:] != keys[:-1]])) if len(keys) else np.empty(0, dtype = int)
+    ends   = np.append(starts[1:], len(keys))
+    return {keys[start]: slice(start, end) for start, end in zip(starts, ends)}
+
+
+_artifact = None
+_artifact_loaded = False
+_artifact_lock = threading.Lock()
+
+
+# Returns the artifact of the directory given by an environment variable, or by default the precomputed directory of the
+# repository, loaded once per process. Returns None when there is no usable artifact, in which case everything is computed
+# live.
+def get_artifact():
+    global _artifact, _artifact_loaded
+    with _artifact_lock:
+        if not _artifact_loaded:
+            directory = Path(os.environ.get(constants.PRECOMPUTED_DIR_ENV_VAR, Path(__file__).resolve().parents[1] / constants.PRECOMPUTED_DIR))
+            if (directory / MANIFEST_FILE).exists():
+                try:
+                    _artifact = Artifact(directory)
+                except (ValueError, OSError) as error:
+                    logging.warning(f"Ignoring precomputed comparisons in {directory}: {error}")
+            _artifact_loaded = True
+        return _artifact
+
+
+def lookup(key):
+    artifact = get_artifact()
+    return None if artifact is None else artifact.lookup(key)
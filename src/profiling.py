@@ -0,0 +1,85 @@
+import cProfile
+import json
+import logging
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+from src import constants
+
+
+
+logger = logging.getLogger(__name__)
+
+
+# Collects the duration (and optionally the peak memory allocated) of each stage of a script run. Every stage is logged
+# as a JSON record as soon as it finishes, and the whole run is summarized at the end.
+#
+# Memory is measured with tracemalloc, which slows the code down and is shared by the whole process (e.g. by concurrent
+# Streamlit sessions), so it is only enabled on request.
+class RerunProfiler:
+    def __init__(self, trace_memory = False):
+        self.trace_memory = trace_memory
+        self.stages       = []
+
+    @contextmanager
+    def stage(self, name):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            memory_start, _ = tracemalloc.get_traced_memory()
+
+        # The record is yielded so that stages can add information about themselves, e.g. whether they were cached.
+        record = {"stage": name}
+        start  = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - start) * 1000, 3)
+            if self.trace_memory:
+                _, memory_peak = tracemalloc.get_traced_memory()
+                record["peak_allocated_bytes"] = max(memory_peak - memory_start, 0)
+
+            self.stages.append(record)
+            logger.info(json.dumps({"event": "stage"} | record))
+
+    def summary(self):
+        return {"event": "rerun", "total_ms": round(sum(e["duration_ms"] for e in self.stages), 3), "stages": self.stages}
+
+
+# Profiling options are read from an environment variable holding a comma separated list of: "log" to log timings at
+# INFO level, "panel" to display them in the app, "memory" to also measure allocations.
+def is_enabled(option):
+    options = os.environ.get(constants.PROFILING_ENV_VAR, "").lower().split(",")
+    return option in (e.strip() for e in options)
+
+
+if is_enabled("log") and not logger.handlers:
+    logger.addHandler(logging.StreamHandler())
+    logger.setLevel(logging.INFO)
+
+
+# Profiles a whole script run. Optionally, tracemalloc measures allocations of each stage and a cProfile dump of the run is
+# written to the directory given by another environment variable, to be inspected with e.g. snakeviz.
+@contextmanager
+def profile_rerun():
+    trace_memory = is_enabled("memory")
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+    dump_dir = os.environ.get(constants.PROFILING_DUMP_DIR_ENV_VAR)
+    profile  = cProfile.Profile() if dump_dir else None
+
+    profiler = RerunProfiler(trace_memory = trace_memory)
+    if profile is not None:
+        profile.enable()
+    try:
+        yield profiler
+    finally:
+        if profile is not None:
+            profile.disable()
+            Path(dump_dir).mkdir(parents = True, exist_ok = True)
+            profile.dump_stats(Path(dump_dir) / f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{time.perf_counter_ns()}.prof")
+
+        logger.info(json.dumps(profiler.summary()))
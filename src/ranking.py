@@ -0,0 +1,73 @@
+import numpy as np
+
+from src import constants
+from src import cost_model
+
+
+
+# Piecewise ranking of the options over health expenses. The crossovers split the expenses into intervals within which
+# the ordering of the options can't change, so the ordering is computed once per interval and then simply looked up.
+# With many options the number of intervals grows quadratically, so only the depth cheapest options of each interval can
+# be kept (all of them by default).
+class RankingIndex:
+    def __init__(self, labels, x, y, crossovers, depth = None, chunk_size = constants.EVALUATION_CHUNK_SIZE):
+        self.labels     = np.asarray(labels, dtype = object)
+        self.x          = np.asarray(x, dtype = float)
+        self.y          = np.asarray(y, dtype = float)
+        self.crossovers = np.asarray(crossovers, dtype = float)
+        self.slopes     = cost_model.segments_from_breakpoints(self.x, self.y)[0]
+
+        # Interval idx covers [starts[idx], ends[idx]).
+        self.starts = np.concatenate([[0.], self.crossovers])
+        self.ends   = np.concatenate([self.crossovers, [np.inf]])
+
+        # Sort options by which is smallest in the middle of each interval, so that order[idx] lists the options from
+        # cheapest to most expensive. Intervals are processed in chunks to keep the cost matrix in memory bounded, and the
+        # order is stored with the smallest integer type that fits.
+        n_options      = len(self.labels)
+        self.depth     = n_options if depth is None else min(depth, n_options)
+        middles        = np.where(np.isfinite(self.ends), (self.starts + self.ends) / 2, self.starts + 1000)
+        self.order     = np.empty((len(middles), self.depth), dtype = np.min_scalar_type(max(n_options - 1, 0)))
+        rows_per_chunk = max(chunk_size // max(n_options, 1), 1)
+        for start in range(0, len(middles), rows_per_chunk):
+            costs = self.cost_at(middles[start : start + rows_per_chunk]).T
+            self.order[start : start + rows_per_chunk] = np.argsort(costs, axis = 1, kind = "stable")[:, :self.depth]
+
+    def __len__(self):
+        return len(self.starts)
+
+    # Returns the cost of every option at every expense level, with shape (n_options, len(x)).
+    def cost_at(self, x):
+        return cost_model.interpolate(np.atleast_1d(x), self.x, self.y, self.slopes)
+
+    def interval_at(self, x):
+        return np.searchsorted(self.crossovers, x, side = "right")
+
+    # Returns the rank of every option at expense x, 0 being the cheapest.
+    def rank_at(self, x):
+        self._check_depth(len(self.labels))
+        ranks = np.empty(len(self.labels), dtype = int)
+        ranks[self.order[self.interval_at(x)]] = np.arange(len(self.labels))
+        return ranks
+
+    def top_k_at(self, x, k = 3):
+        self._check_depth(k)
+        return self.labels[self.order[self.interval_at(x), :k]]
+
+    # Returns starts, ends and labels of the k cheapest options (None when there are less than k options) of every
+    # interval, after merging adjacent intervals for which the top k does not change.
+    def top_k(self, k = 3):
+        self._check_depth(k)
+        top = np.full((len(self), k), -1)
+        top[:, :min(k, self.depth)] = self.order[:, :k]
+
+        changed = np.concatenate([[True], (top[1:] != top[:-1]).any(axis = 1)])
+        first   = np.flatnonzero(changed)
+        last    = np.concatenate([first[1:] - 1, [len(self) - 1]])
+
+        labels = np.append(self.labels, None)[top[first]]
+        return self.starts[first], self.ends[last], labels
+
+    def _check_depth(self, k):
+        if k > self.depth and self.depth < len(self.labels):
+            raise ValueError(f"Only the {self.depth} cheapest options were kept in the ranking, cannot rank {k} of them.")
@@ -0,0 +1,85 @@
+import numpy as np
+
+from src import constants
+from src import envelope
+
+
+
+PARAMETERS = ["cost_per_month", "deducible", "excess"]
+
+
+# What-if analysis of one option: two of its parameters are varied over a grid, and for every cell of the grid the health
+# expenses at which the modified option is the cheapest of all are found in closed form, for all cells at once.
+#
+# The cheapest of the other options is their lower envelope, a fixed piecewise-linear curve. The cost of the modified
+# option is the minimum of its three lines (it is concave), so the difference between both is linear between the
+# breakpoints of the envelope and of the option, and its sign changes at most once between two of them, at a point given
+# by linear interpolation. The grid is processed in chunks to keep intermediate arrays bounded.
+#
+# Returns three arrays of shape (len(y_values), len(x_values)): the first and the last health expenses at which the option
+# is the cheapest (NaN if it never is, infinite if it stays the cheapest for any larger expenses), and the total range of
+# expenses, up to the right limit of the plot, over which it is the cheapest.
+def sweep(model, option, x_param, x_values, y_param, y_values, chunk_size = constants.EVALUATION_CHUNK_SIZE):
+    if x_param == y_param or {x_param, y_param} - set(PARAMETERS):
+        raise ValueError(f"Programming error: expected two different parameters among {PARAMETERS}, got: {x_param}, {y_param}.")
+    if len(model) < 2:
+        raise ValueError(f"Programming error: at least one other option is needed to compare with, got {len(model)} options.")
+
+    x_values, y_values = np.asarray(x_values, dtype = float), np.asarray(y_values, dtype = float)
+    params = np.empty((len(y_values), len(x_values), 3))
+    params[:] = [model.cost_per_month[option], model.deducible[option], model.excess[option]]
+    params[:, :, PARAMETERS.index(x_param)] = x_values[None, :]
+    params[:, :, PARAMETERS.index(y_param)] = y_values[:, None]
+    params = params.reshape(-1, 3)
+
+    # Lower envelope of the lines of the other options, with one piece per line.
+    others = np.arange(len(model)) != option
+    slope, intercept, _, _ = (e[others] for e in model.segments)
+    if not envelope.is_concave(slope):
+        raise ValueError("Cost curves of the options must be concave, which requires positive deducibles and excesses.")
+    piece_starts, _, lines = envelope.lower_envelope(np.arange(slope.size), slope, intercept)
+    piece_slope, piece_intercept = slope.ravel()[lines], intercept.ravel()[lines]
+
+    # Same right limit as the plot of the options, whatever the cell of the grid.
+    x_right = (1 + model.mergin_right_ratio) * max(model.breakpoints[0][others, :-1].max(), (params[:, 1] + 10 * params[:, 2]).max())
+
+    starts, ends, widths = [], [], []
+    n_points = len(piece_starts) + 3
+    for idx in range(0, len(params), max(chunk_size // n_points, 1)):
+        chunk = params[idx : idx + max(chunk_size // n_points, 1)]
+        result = _sweep_chunk(chunk, piece_starts, piece_slope, piece_intercept, x_right)
+        for values, result_values in zip((starts, ends, widths), result):
+            values.append(result_values)
+
+    shape = (len(y_values), len(x_values))
+    return tuple(np.concatenate(e).reshape(shape) for e in (starts, ends, widths))
+
+
+def _sweep_chunk(params, piece_starts, piece_slope, piece_intercept, x_right):
+    cost_per_year, deducible, excess = 12 * params[:, 0], params[:, 1], params[:, 2]
+
+    # Breakpoints of the difference between the option and the envelope, sorted for every cell.
+    x = np.concatenate([np.broadcast_to(piece_starts, (len(params), len(piece_starts))),
+                        deducible[:, None], (deducible + 10 * excess)[:, None], np.full((len(params), 1), x_right)], axis = 1)
+    x = np.sort(np.minimum(x, x_right), axis = 1)
+
+    # Lines of the option: all expenses up to the deducible, then the excess rate, then nothing.
+    option_cost = np.minimum(np.minimum(x, (0.9 * deducible)[:, None] + 0.1 * x), (deducible + excess)[:, None]) + cost_per_year[:, None]
+    piece = np.searchsorted(piece_starts, x, side = "right") - 1
+    diff  = option_cost - (piece_slope[piece] * x + piece_intercept[piece])
+
+    # Part of every interval between consecutive breakpoints where the option is strictly cheaper.
+    x0, x1, d0, d1 = x[:, :-1], x[:, 1:], diff[:, :-1], diff[:, 1:]
+    with np.errstate(divide = "ignore", invalid = "ignore"):
+        crossing = x0 + (x1 - x0) * d0 / (d0 - d1)
+    win_start = np.where(d0 < 0, x0, np.where(d1 < 0, crossing, np.nan))
+    win_end   = np.where(d1 < 0, x1, np.where(d0 < 0, crossing, np.nan))
+
+    winning = ~np.isnan(win_start)
+    widths  = np.where(winning, win_end - win_start, 0).sum(axis = 1)
+    starts  = np.where(winning.any(axis = 1), np.where(winning, win_start, np.inf).min(axis = 1), np.nan)
+    ends    = np.where(winning.any(axis = 1), np.where(winning, win_end, -np.inf).max(axis = 1), np.nan)
+
+    # All curves are flat after the right limit, so an option cheapest there stays the cheapest.
+    ends = np.where(diff[:, -1] < 0, np.inf, ends)
+    return starts, ends, widths
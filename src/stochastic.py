@@ -0,0 +1,140 @@
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from src import constants
+from src import cost_model
+from src import tables
+
+
+
+# Distributions of the health expenses of a year. Each one draws samples with sample(rng, size) and has a key identifying
+# it with its parameters, used to cache simulations.
+class LogNormal:
+    def __init__(self, median, sigma):
+        if median <= 0 or sigma < 0:
+            raise ValueError(f"The median must be positive and the spread non-negative, got: {median}, {sigma}.")
+        self.median = float(median)
+        self.sigma  = float(sigma)
+
+    @property
+    def key(self):
+        return f"lognormal({self.median!r}, {self.sigma!r})"
+
+    def sample(self, rng, size):
+        return rng.lognormal(np.log(self.median), self.sigma, size)
+
+
+# Many people have no health expenses at all in a year: draws are 0 with probability p_zero, and otherwise follow another
+# distribution.
+class ZeroInflated:
+    def __init__(self, p_zero, distribution):
+        if not 0 <= p_zero <= 1:
+            raise ValueError(f"The probability of having no expenses must be between 0 and 1, got: {p_zero}.")
+        self.p_zero       = float(p_zero)
+        self.distribution = distribution
+
+    @property
+    def key(self):
+        return f"zero_inflated({self.p_zero!r}, {self.distribution.key})"
+
+    def sample(self, rng, size):
+        return np.where(rng.random(size) < self.p_zero, 0., self.distribution.sample(rng, size))
+
+
+# Empirical distribution given by a histogram: a bin is drawn with probability proportional to its count, then a value
+# uniformly within the bin.
+class Histogram:
+    COLUMNS = ["bin_start", "bin_end", "count"]
+
+    def __init__(self, bin_start, bin_end, count):
+        self.bin_start = np.asarray(bin_start, dtype = float)
+        self.bin_end   = np.asarray(bin_end, dtype = float)
+        self.count     = np.asarray(count, dtype = float)
+
+        if len({self.bin_start.shape, self.bin_end.shape, self.count.shape}) != 1 or self.count.ndim != 1 or len(self.count) == 0:
+            raise ValueError("The histogram columns must be non-empty and of the same length.")
+        if not np.isfinite(np.concatenate([self.bin_start, self.bin_end, self.count])).all():
+            raise ValueError("The histogram must only contain finite numbers.")
+        if (self.bin_start < 0).any() or (self.bin_end < self.bin_start).any():
+            raise ValueError("Histogram bins must have 0 <= bin_start <= bin_end.")
+        if (self.count < 0).any() or self.count.sum() <= 0:
+            raise ValueError("Histogram counts must be non-negative and not all zero.")
+
+        self._cumulative = np.cumsum(self.count) / self.count.sum()
+
+    @classmethod
+    def from_file(cls, file, file_name = None):
+        df = tables.read_table(file, file_name)
+        missing_columns = set(cls.COLUMNS) - set(df.columns)
+        if missing_columns:
+            raise ValueError(f"The histogram is missing the following columns: {', '.join(sorted(missing_columns))}.")
+        df = df[cls.COLUMNS].apply(pd.to_numeric, errors = "coerce")
+        return cls(df["bin_start"], df["bin_end"], df["count"])
+
+    @property
+    def key(self):
+        digest = hashlib.sha256(np.stack([self.bin_start, self.bin_end, self.count]).tobytes())
+        return f"histogram({digest.hexdigest()})"
+
+    def sample(self, rng, size):
+        bins = np.searchsorted(self._cumulative, rng.random(size) * self._cumulative[-1], side = "right")
+        bins = np.minimum(bins, len(self.count) - 1)
+        return self.bin_start[bins] + rng.random(size) * (self.bin_end[bins] - self.bin_start[bins])
+
+
+# Simulates the yearly cost of every option over draws of the health expenses, and returns for each option its expected
+# cost, some percentiles of its cost and the probability that it is the cheapest one (ties go to the first option).
+#
+# Draws are processed in chunks so that memory stays bounded whatever the number of draws. Percentiles can not be computed
+# exactly from streamed chunks, but the cost of an option is bounded (between the yearly premium and the premium plus the
+# deducible and the maximal excess), so a fixed histogram of each option's cost is accumulated instead. The bounds are
+# reached by many draws (no expenses, expenses over the excess cap) and get bins of their own, the percentiles within the
+# other bins are interpolated. The number of draws is reduced for many options to bound the total work.
+def simulate(model, distribution, n_draws = constants.MONTE_CARLO_DRAWS, percentiles = constants.MONTE_CARLO_PERCENTILES,
+             seed = constants.MONTE_CARLO_SEED, chunk_size = constants.MONTE_CARLO_CHUNK_SIZE,
+             n_bins = constants.MONTE_CARLO_HISTOGRAM_BINS):
+    n_options = len(model)
+    n_draws   = max(min(n_draws, constants.MONTE_CARLO_MAX_EVALUATIONS // max(n_options, 1)), 1)
+    chunk_len = max(chunk_size // max(n_options, 1), 1)
+    rng       = np.random.default_rng(seed)
+
+    _, fp     = model.breakpoints
+    slope, intercept, _, _ = model.segments
+    low, high = fp[:, :1], fp[:, -1:]
+    bin_width = np.maximum(high - low, np.finfo(float).tiny) / n_bins
+    offsets   = np.arange(n_options)[:, None] * (n_bins + 2)
+
+    total_cost = np.zeros(n_options)
+    n_cheapest = np.zeros(n_options, dtype = np.int64)
+    histograms = np.zeros(n_options * (n_bins + 2), dtype = np.int64)
+    for start in range(0, n_draws, chunk_len):
+        costs = cost_model.concave_costs(slope, intercept, distribution.sample(rng, min(chunk_len, n_draws - start)))
+
+        total_cost += costs.sum(axis = 1)
+        n_cheapest += np.bincount(costs.argmin(axis = 0), minlength = n_options)
+
+        # Bin 0 holds costs at the lower bound, bin n_bins + 1 costs at the upper bound, others the costs in between.
+        bins = np.clip(np.floor((costs - low) / bin_width).astype(np.int64) + 1, 1, n_bins)
+        bins = np.where(costs <= low, 0, np.where(costs >= high, n_bins + 1, bins))
+        histograms += np.bincount((bins + offsets).ravel(), minlength = len(histograms))
+
+    histograms = histograms.reshape(n_options, n_bins + 2)
+    df = pd.DataFrame({"label": model.labels, "expected_cost": total_cost / n_draws})
+    for percentile in percentiles:
+        df[f"p{percentile}"] = _histogram_percentile(histograms, low[:, 0], high[:, 0], bin_width[:, 0], percentile / 100)
+    df["probability_cheapest"] = n_cheapest / n_draws
+    return df
+
+
+def _histogram_percentile(histograms, low, high, bin_width, quantile):
+    cumulative = np.cumsum(histograms, axis = 1)
+    target     = quantile * cumulative[:, -1]
+    bins       = np.minimum((cumulative < target[:, None]).sum(axis = 1), histograms.shape[1] - 1)
+
+    rows         = np.arange(len(histograms))
+    count_before = np.where(bins > 0, cumulative[rows, np.maximum(bins - 1, 0)], 0)
+    fraction     = np.clip((target - count_before) / np.maximum(histograms[rows, bins], 1), 0, 1)
+    interior     = low + (bins - 1 + fraction) * bin_width
+    return np.where(bins == 0, low, np.where(bins == histograms.shape[1] - 1, high, interior))
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pandas as pd
+
+
+
+# Tables of offers, catalogs and histograms are read from and written to CSV or Parquet files, chosen by their suffix.
+FORMATS = (".csv", ".parquet")
+
+
+# Returns the format of a file from its name, i.e. its suffix in lower case. Raises a ValueError for any other format.
+def table_format(file_name):
+    suffix = Path(file_name).suffix.lower()
+    if suffix not in FORMATS:
+        raise ValueError(f"Unsupported file format for {file_name}, expected a .csv or .parquet file.")
+    return suffix
+
+
+# Reads a whole table, from a path or from a file object whose file_name gives the format (e.g. an uploaded file).
+def read_table(file, file_name = None, columns = None):
+    if table_format(file_name if file_name is not None else file) == ".csv":
+        return pd.read_csv(file, usecols = columns)
+    return pd.read_parquet(file, columns = columns)
+
+
+# Reads a table from a path in chunks of chunk_size rows, keeping memory bounded whatever the size of the file.
+def read_table_chunks(path, columns, chunk_size):
+    if table_format(path) == ".csv":
+        yield from pd.read_csv(path, usecols = columns, chunksize = chunk_size)
+    else:
+        # Only imported when needed, pyarrow is an optional dependency of pandas.
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size = chunk_size, columns = columns):
+            yield batch.to_pandas()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+
+
+STANDARD_DEDUCIBLES = [300., 500., 1000., 1500., 2000., 2500.]
+
+OFFER_KINDS = ["random", "tied_premiums", "collinear", "exact_crossings", "rounded_excesses"]
+
+
+# Sets of offers the comparison must handle exactly. Premiums drawn from a few round values make many options tie and many
+# curves cross exactly at their breakpoints, where rounding errors matter. Equal premiums and deducibles with different
+# excesses make collinear segments.
+def make_offers(kind, n, rng):
+    if kind == "random":
+        cost_per_month, deducible, excess = rng.uniform(200, 500, n).round(2), rng.choice(STANDARD_DEDUCIBLES, n), np.full(n, 700.)
+    elif kind == "tied_premiums":
+        cost_per_month, deducible, excess = rng.choice([300., 310., 320.], n), rng.choice(STANDARD_DEDUCIBLES, n), rng.choice([350., 700.], n)
+    elif kind == "collinear":
+        cost_per_month, deducible, excess = rng.choice([300., 350.], n), rng.choice([300., 2500.], n), rng.choice([100., 350., 700.], n)
+    elif kind == "exact_crossings":
+        # Premiums such that every curve crosses the one of the lowest deducible exactly where its deducible ends.
+        deducible      = rng.choice(STANDARD_DEDUCIBLES, n)
+        cost_per_month = 400. - 0.9 * (deducible - 300.) / 12
+        excess         = np.full(n, 700.)
+    elif kind == "rounded_excesses":
+        # Excesses without an exact binary representation, such that crossings at the ends of segments are off by rounding
+        # errors.
+        cost_per_month, deducible, excess = rng.choice([290.5, 300., 310., 320.], n), rng.choice([300., 500., 1000., 2500.], n), rng.choice([700 / 3, 350., 700.], n)
+    else:
+        raise ValueError(f"Unknown kind of offers: {kind}.")
+    return pd.DataFrame({"label"         : pd.Series([f"Option {idx + 1}" for idx in range(n)], dtype = object),
+                         "cost_per_month": cost_per_month,
+                         "deducible"     : deducible,
+                         "excess"        : excess})
+
+
+# Cost of every offer at every amount of health expenses, evaluated directly from the rules of the insurance: the premiums,
+# all expenses up to the deducible, then 10% of the expenses above it up to the excess. Shape (n_offers, len(x)).
+def costs(df, x):
+    x = np.asarray(x, dtype = float)[None, :]
+    cost_per_month, deducible, excess = (df[col_name].to_numpy(dtype = float)[:, None] for col_name in ("cost_per_month", "deducible", "excess"))
+    return 12 * cost_per_month + np.minimum(x, deducible) + np.minimum(0.1 * np.maximum(x - deducible, 0), excess)
+
+
+# Amounts of expenses within the range [start, end) of a row of a ranking table, away from its ends where options tie.
+def points_within(start, end):
+    if not np.isfinite(end):
+        return start + np.array([1., 1000., 1e6])
+    return start + (end - start) * np.array([0.01, 0.5, 0.99])
@@ -0,0 +1,16 @@
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Make the repository importable when running pytest from any directory.
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+
+# Random generator seeded by the name of the test, so that every test draws the same offers on every run.
+@pytest.fixture
+def rng(request):
+    return np.random.default_rng(zlib.crc32(request.node.name.encode()))
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+
+import brute_force
+from src import catalog
+
+
+
+def test_repeated_offers_get_unique_labels():
+    df = pd.DataFrame({"insurer"       : ["A", "A", "A", "B"],
+                       "model"         : ["Standard", "Standard", "Standard", "HMO"],
+                       "region"        : ["ZH"] * 4,
+                       "age_band"      : ["26+"] * 4,
+                       "deducible"     : [300., 300., 300.4, 300.],
+                       "cost_per_month": [400., 390., 380., 350.]})
+    df_offers = catalog.Catalog(df).offers("ZH", "26+")
+    assert df_offers["label"].is_unique
+    assert df_offers["label"].tolist() == ["A · Standard · 300", "A · Standard · 300 (2)", "A · Standard · 300 (3)", "B · HMO · 300"]
+
+
+def test_cheapest_matches_brute_force(rng):
+    df = brute_force.make_offers("tied_premiums", 100, rng)
+    df = df.assign(insurer = rng.choice(["A", "B", "C"], len(df)), model = "Standard", region = "ZH", age_band = "26+")
+    df_offers   = catalog.Catalog(df.drop(columns = "label")).offers("ZH", "26+")
+    df_cheapest = catalog.cheapest(df_offers)
+
+    for start, end, label in zip(df_cheapest["start"], df_cheapest["end"], df_cheapest["label"]):
+        costs = brute_force.costs(df_offers, brute_force.points_within(start, end))
+        np.testing.assert_allclose(costs[df_offers["label"].tolist().index(label)], costs.min(axis = 0), rtol = 1e-9)
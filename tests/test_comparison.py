@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import brute_force
+from src import comparison
+from src import cost_model
+
+
+
+K = 3
+
+
+def _ranking_index_without_dominance(df):
+    df_points = comparison.make_df_points(df)
+    df_lines  = comparison.make_df_lines(df_points)
+    return comparison.make_ranking_index(df_points, comparison.make_intersections(df_lines))
+
+
+# Checks every row of a ranking table against the costs evaluated by brute force inside its range of expenses. Costs are
+# compared rather than labels, since tied options may be listed in any order.
+def _check_ranking_table(df, df_ranking):
+    starts, ends = df_ranking["start"].to_numpy(), df_ranking["end"].to_numpy()
+    assert starts[0] == 0 and np.isinf(ends[-1])
+    np.testing.assert_array_equal(starts[1:], ends[:-1])
+
+    position = {label: idx for idx, label in enumerate(df["label"])}
+    for start, end, *cheapest in df_ranking.itertuples(index = False):
+        listed = [label for label in cheapest if label is not None]
+        assert len(listed) == min(K, len(df))
+
+        costs = brute_force.costs(df, brute_force.points_within(start, end))
+        np.testing.assert_allclose(costs[[position[label] for label in listed]], np.sort(costs, axis = 0)[:len(listed)],
+                                   rtol = 1e-9, atol = 1e-6)
+
+
+# Costs, evaluated by brute force, of the options listed by a ranking table at each of the given health expenses.
+def _listed_costs(df, df_ranking, x):
+    position = {label: idx for idx, label in enumerate(df["label"])}
+    rows     = np.searchsorted(df_ranking["end"].to_numpy(), x, side = "right")
+    listed   = np.vectorize(position.get)(df_ranking[comparison.ranking_columns(K)].to_numpy()[rows])
+    return brute_force.costs(df, x)[listed, np.arange(len(x))[:, None]]
+
+
+@pytest.mark.parametrize("kind", brute_force.OFFER_KINDS)
+@pytest.mark.parametrize("n", [2, 5, 30, 120])
+def test_ranking_table_matches_brute_force(kind, n, rng):
+    for _ in range(5):
+        df = brute_force.make_offers(kind, n, rng)
+        _, ranking_index, _ = comparison.compute_comparison(df, K)
+        _check_ranking_table(df, comparison.make_ranking_table(ranking_index, K))
+
+
+def test_identical_offers_tie_everywhere():
+    df = brute_force.make_offers("random", 3, np.random.default_rng(0))
+    df.loc[1, ["cost_per_month", "deducible", "excess"]] = df.loc[0, ["cost_per_month", "deducible", "excess"]]
+    _, ranking_index, never_worth_it = comparison.compute_comparison(df, K)
+    _check_ranking_table(df, comparison.make_ranking_table(ranking_index, K))
+    assert never_worth_it == []
+
+
+@pytest.mark.parametrize("kind", brute_force.OFFER_KINDS)
+@pytest.mark.parametrize("n", [5, 30, 120])
+def test_dominance_filter_keeps_the_ranking(kind, n, rng):
+    df = brute_force.make_offers(kind, n, rng)
+    expected = comparison.make_ranking_table(_ranking_index_without_dominance(df), K)
+
+    _, filtered, never_worth_it = comparison.compute_comparison(df, K)
+    from_model = comparison.make_ranking_index_from_model(cost_model.CostModel.from_dataframe(df), depth = K)
+    for ranking_index in (filtered, from_model):
+        df_ranking = comparison.make_ranking_table(ranking_index, K)
+        _check_ranking_table(df, df_ranking)
+
+        # Tied options may swap at different health expenses, so both tables are compared by the costs they list, within
+        # every row of both.
+        starts = np.union1d(df_ranking["start"], expected["start"])
+        x = np.concatenate([brute_force.points_within(start, end) for start, end in zip(starts, np.append(starts[1:], np.inf))])
+        np.testing.assert_allclose(_listed_costs(df, df_ranking, x), _listed_costs(df, expected, x), rtol = 1e-9, atol = 1e-6)
+
+    # Options dropped by the filter are never among the cheapest, and the others are kept in the order of the offers.
+    assert set(never_worth_it).isdisjoint(expected[comparison.ranking_columns(K)].to_numpy().ravel())
+    assert list(filtered.labels) + never_worth_it == sorted(df["label"], key = lambda label: label in never_worth_it)
@@ -0,0 +1,27 @@
+import pytest
+
+import comparison_service
+from src import constants
+
+
+
+def _offers(deducible):
+    return [{"label": "A", "cost_per_month": 300, "deducible": 300,       "excess": 700},
+            {"label": "B", "cost_per_month": 310, "deducible": deducible, "excess": 700.}]
+
+
+@pytest.mark.parametrize("deducible", [True, "500", None, [500]])
+def test_non_numbers_are_rejected(deducible):
+    with pytest.raises(ValueError):
+        comparison_service._parse_offers(_offers(deducible))
+
+
+@pytest.mark.parametrize("deducible", [0, -300, constants.MAX_NUM_INPUTS_VALUE + 1, 10 ** 400, float("nan"), float("inf")])
+def test_values_out_of_bounds_are_rejected(deducible):
+    with pytest.raises(ValueError):
+        comparison_service._parse_offers(_offers(deducible))
+
+
+def test_valid_offers_are_parsed():
+    offers = comparison_service._parse_offers(_offers(constants.MAX_NUM_INPUTS_VALUE))
+    assert offers.to_dataframe()["deducible"].tolist() == [300., constants.MAX_NUM_INPUTS_VALUE]
@@ -0,0 +1,21 @@
+import numpy as np
+
+import brute_force
+from src import cost_model
+
+
+
+def test_cost_at_matches_np_interp(rng):
+    df    = brute_force.make_offers("tied_premiums", 50, rng)
+    model = cost_model.CostModel.from_dataframe(df)
+    x     = np.concatenate([[0.], model.breakpoints[0].ravel(), rng.uniform(0, 20_000, 1000), [1e9]])
+
+    xp, fp = model.breakpoints
+    expected = np.stack([np.interp(x, xp[idx], fp[idx]) for idx in range(len(model))])
+    np.testing.assert_array_equal(model.cost_at(x, chunk_size = 1000), expected)
+
+
+def test_cost_at_matches_brute_force(rng):
+    df = brute_force.make_offers("random", 50, rng)
+    x  = rng.uniform(0, 10_000, 1000)
+    np.testing.assert_allclose(cost_model.CostModel.from_dataframe(df).cost_at(x), brute_force.costs(df, x), rtol = 1e-12)
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import brute_force
+from src import comparison
+from src import constants
+from src import crossovers
+
+
+
+def test_crossing_just_outside_a_segment_is_kept_on_it():
+    end = 1000 * (1 + constants.CROSSOVERS_RELATIVE_TOLERANCE / 10)
+    x_inter = crossovers.segment_crossovers(*np.array([[1., 0., 0., 1000., 0., end, 0., np.inf]]).T)[:, 0]
+    assert x_inter[0] == 1000.
+    assert np.isnan(x_inter[1:]).all()
+
+
+def test_crossing_outside_both_segments_is_ignored():
+    x_inter = crossovers.segment_crossovers(*np.array([[1., 0., 0., 1000., 0., 1001., 0., np.inf]]).T)
+    assert np.isnan(x_inter).all()
+
+
+def test_collinear_segments_part_ways_at_their_overlap():
+    x_inter = crossovers.segment_crossovers(*np.array([[0.1, 100., 300., 7300., 0.1, 100., 300., 3800.]]).T)[:, 0]
+    assert np.isnan(x_inter[0]) and np.isnan(x_inter[1])
+    assert x_inter[2] == 3800.
+
+    x_inter = crossovers.segment_crossovers(*np.array([[0.1, 100., 300., 7300., 0.1, 100., 2500., 9500.]]).T)[:, 0]
+    assert x_inter[1] == 2500. and x_inter[2] == 7300.
+
+
+def test_near_duplicates_are_merged():
+    values = [2500. * (1 + constants.CROSSOVERS_RELATIVE_TOLERANCE / 2), 300., 2500., 0., 2501.]
+    np.testing.assert_array_equal(crossovers.unique_within_tolerance(values), [0., 300., 2500., 2501.])
+
+
+def test_find_crossovers_matches_all_pairs():
+    rng = np.random.default_rng(0)
+    slope, intercept = rng.choice([0., 0.1, 1.], (30, 3)), rng.choice([0., 100., 200.], (30, 3))
+    x_min = np.sort(rng.choice([0., 300., 1000., 2500.], (30, 3)), axis = 1)
+    x_max = x_min + rng.choice([500., 1000.], (30, 3))
+    option_idx = np.repeat(np.arange(30), 3).reshape(30, 3)
+
+    pairs = crossovers.segment_crossovers(*(e.ravel()[:, None] for e in (slope, intercept, x_min, x_max)),
+                                          *(e.ravel()[None, :] for e in (slope, intercept, x_min, x_max)))
+    expected = pairs[:, option_idx.ravel()[:, None] != option_idx.ravel()[None, :]]
+    np.testing.assert_allclose(crossovers.find_crossovers(option_idx, slope, intercept, x_min, x_max, chunk_size = 50),
+                               crossovers.unique_within_tolerance(expected[~np.isnan(expected)]))
+
+
+@pytest.mark.parametrize("kind", brute_force.OFFER_KINDS)
+def test_crossovers_of_offers_are_unique(kind, rng):
+    df = brute_force.make_offers(kind, 60, rng)
+    df_points = comparison.make_df_points(df)
+    df_lines  = comparison.make_df_lines(df_points)
+    intersections = np.asarray(comparison.make_intersections(df_lines))
+    assert (np.diff(intersections) > constants.CROSSOVERS_RELATIVE_TOLERANCE * np.maximum(np.abs(intersections[1:]), 1)).all()
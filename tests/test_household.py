@@ -0,0 +1,41 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import brute_force
+from src import household
+
+
+
+# Average cost of every offer over a dense grid of the range of expenses, evaluated by brute force.
+def _average_costs(df_offers, low, high):
+    return brute_force.costs(df_offers, np.linspace(low, high, 200_001)).mean(axis = 1)
+
+
+@pytest.mark.parametrize("kind", brute_force.OFFER_KINDS)
+def test_assignment_is_the_cheapest_of_all(kind, rng):
+    members = [(brute_force.make_offers(kind, int(rng.integers(1, 6)), rng), *np.sort(rng.choice([0., 500., 2000., 8000., 20_000.], 2)))
+               for _ in range(3)]
+    chosen, expected_total = household.optimize(members)
+
+    # Every assignment of offers to members, evaluated by brute force.
+    averages = [_average_costs(df_offers, low, high) for df_offers, low, high in members]
+    totals   = {choices: sum(member_averages[choice] for member_averages, choice in zip(averages, choices))
+                for choices in itertools.product(*(range(len(df_offers)) for df_offers, _, _ in members))}
+    np.testing.assert_allclose(totals[tuple(chosen)], min(totals.values()), rtol = 1e-6)
+    np.testing.assert_allclose(expected_total, totals[tuple(chosen)], rtol = 1e-6)
+
+
+def test_identical_members_get_the_same_offer(rng):
+    df_offers = brute_force.make_offers("tied_premiums", 30, rng)
+    chosen, _ = household.optimize([(df_offers, 0., 5000.), (df_offers, 0., 5000.)])
+    assert chosen[0] == chosen[1]
+
+
+def test_empty_range_uses_the_cost_at_its_expenses(rng):
+    df_offers = brute_force.make_offers("random", 10, rng)
+    chosen, expected_total = household.optimize([(df_offers, 1500., 1500.)])
+    costs = brute_force.costs(df_offers, [1500.])[:, 0]
+    assert costs[chosen[0]] == costs.min()
+    np.testing.assert_allclose(expected_total, costs.min())
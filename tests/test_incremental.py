@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import brute_force
+from src import comparison
+from src import constants
+from src import incremental
+
+
+
+VALUE_COLUMNS = ["cost_per_month", "deducible", "excess"]
+
+
+def _check_same_comparison(engine):
+    df = pd.DataFrame({"label": pd.Series(engine.labels, dtype = object), **dict(zip(VALUE_COLUMNS, engine.values.T))})
+    df_points, ranking_index, never_worth_it = engine.compute()
+    expected_points, expected_index, expected_never_worth_it = comparison.compute_comparison(df, engine.k)
+
+    pd.testing.assert_frame_equal(df_points, expected_points)
+    assert list(ranking_index.labels) == list(expected_index.labels)
+    np.testing.assert_allclose(ranking_index.crossovers, expected_index.crossovers, rtol = 1e-9)
+    np.testing.assert_array_equal(ranking_index.x, expected_index.x)
+    np.testing.assert_array_equal(ranking_index.y, expected_index.y)
+    np.testing.assert_array_equal(ranking_index.order, expected_index.order)
+    assert never_worth_it == expected_never_worth_it
+
+
+# Random edits like the ones of a session: new values for some rows (with or without new labels), new labels only, new
+# rows and deleted rows, always keeping the number of options within the limits of the app.
+def _random_edit(engine, kind, rng, new_labels):
+    def new_values(n):
+        return brute_force.make_offers(kind, n, rng)[VALUE_COLUMNS].to_numpy()
+
+    edit = rng.choice(["update", "rename", "append", "delete"])
+    if edit == "append" and len(engine) < constants.MAX_CHOICES:
+        n = min(rng.integers(1, 4), constants.MAX_CHOICES - len(engine))
+        engine.append([next(new_labels) for _ in range(n)], new_values(n))
+    elif edit == "delete" and len(engine) > constants.MIN_CHOICES:
+        engine.delete(rng.choice(len(engine), min(rng.integers(1, 3), len(engine) - constants.MIN_CHOICES), replace = False))
+    else:
+        rows   = rng.choice(len(engine), min(rng.integers(1, 4), len(engine)), replace = False)
+        labels = [next(new_labels) if rng.random() < 0.5 else label for label in engine.labels[rows]]
+        engine.update(rows, labels, new_values(len(rows)) if edit == "update" else engine.values[rows])
+
+
+@pytest.mark.parametrize("kind", brute_force.OFFER_KINDS)
+@pytest.mark.parametrize("n", [2, 20])
+def test_incremental_matches_full_pipeline(kind, n, rng):
+    engine     = incremental.IncrementalComparison.from_dataframe(brute_force.make_offers(kind, n, rng))
+    new_labels = (f"New option {idx}" for idx in range(10_000))
+    _check_same_comparison(engine)
+    for _ in range(40):
+        for _ in range(rng.integers(1, 3)):
+            _random_edit(engine, kind, rng, new_labels)
+        _check_same_comparison(engine)
+
+
+def test_missing_values_fall_back_to_full_pipeline(rng):
+    engine = incremental.IncrementalComparison.from_dataframe(brute_force.make_offers("random", 5, rng))
+    engine.update([2], ["Option 3"], [[np.nan, 1000., 700.]])
+    _check_same_comparison(engine)
+
+
+def test_duplicate_labels_are_rejected(rng):
+    engine = incremental.IncrementalComparison.from_dataframe(brute_force.make_offers("random", 5, rng))
+    engine.update([1], ["Option 1"], engine.values[[1]])
+    with pytest.raises(ValueError):
+        engine.compute()
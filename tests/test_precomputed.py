@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import brute_force
+import precompute_comparisons
+from src import cache
+from src import comparison
+from src import precomputed
+
+
+
+def test_lookup_matches_live_comparison(rng, tmp_path):
+    offer_sets = [brute_force.make_offers(kind, 20, rng) for kind in brute_force.OFFER_KINDS]
+    precomputed.write(tmp_path, map(precompute_comparisons._precompute, offer_sets))
+    artifact = precomputed.Artifact(tmp_path)
+    assert len(artifact) == len(offer_sets)
+
+    for df in offer_sets:
+        df_ranking, never_worth_it, (labels, x, y) = artifact.lookup(cache.choices_key(df))
+        _, ranking_index, expected_never_worth_it = comparison.compute_comparison(df)
+        pd.testing.assert_frame_equal(df_ranking, comparison.make_ranking_table(ranking_index))
+        assert never_worth_it == list(expected_never_worth_it)
+        assert labels.tolist() == list(ranking_index.labels)
+        np.testing.assert_array_equal(x, ranking_index.x)
+        np.testing.assert_array_equal(y, ranking_index.y)
+
+
+def test_other_k_is_rejected(rng, tmp_path):
+    precomputed.write(tmp_path, [precompute_comparisons._precompute(brute_force.make_offers("random", 5, rng))], k = 3)
+    with pytest.raises(ValueError):
+        precomputed.Artifact(tmp_path, k = 4)
+
+
+def test_only_sets_accepted_by_app_are_precomputed():
+    df_offers = pd.DataFrame({"set"           : ["ok", "ok", "single", "zero", "zero", "long", "long"],
+                              "label"         : ["A", "B", "A", "A", "B", "A", "B" * 50],
+                              "cost_per_month": [300., 310., 300., 300., 310., 300., 310.],
+                              "deducible"     : [300., 500., 300., 0., 500., 300., 500.],
+                              "excess"        : [700., 700., 700., 700., 700., 700., 700.]})
+    sets = list(precompute_comparisons._iter_sets(df_offers, ["set"]))
+    assert len(sets) == 1
+    assert sets[0]["label"].tolist() == ["A", "B"]